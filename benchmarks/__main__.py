@@ -0,0 +1,127 @@
+"""
+Run the benchmark suite, saving its results as JSON to compare them across commits.
+
+Run from the repository root with `python -m benchmarks [filter ...] [-o results.json] [-c baseline.json]`.
+Filters select the benchmarks whose `module.function` name contains any of them, e.g. `render` or
+`bench_snake_game`. Every benchmark draws on in-process stand-ins rather than a terminal, so the suite runs
+headless.
+"""
+import argparse
+import importlib
+import inspect
+import json
+import pkgutil
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Results slower than their baseline by more than this fraction are reported as regressions; timings of the
+# same tree on a busy machine can differ by a tenth or more
+THRESHOLD = .25
+
+
+def find_benchmarks(filters: list) -> list:
+    """Return the (module, function) pairs of the benchmarks matching any of the filters, or all of them."""
+    benchmarks = []
+    for info in pkgutil.iter_modules([str(Path(__file__).parent)]):
+        if not info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{info.name}")
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            qualified = f"{info.name}.{name}"
+            if name.startswith("bench_") and function.__module__ == module.__name__ and (
+                    not filters or any(part in qualified for part in filters)):
+                benchmarks.append((module, function))
+    return benchmarks
+
+
+def git_commit() -> str:
+    """The commit the tree is at, marked when it has changes, or None outside a git repository."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        changes = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                                 text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + "-dirty" if changes else commit
+
+
+def result_key(benchmark: str, result: dict) -> tuple:
+    """Identify a result by its benchmark and the parameters it was measured for, leaving out the measurements."""
+    return (benchmark, *((name, value) for name, value in result.items() if not isinstance(value, float)))
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> int:
+    """
+    Print how long each result took against its baseline, returning the count of regressions.
+
+    Results with terminal output also regress when they send more bytes per frame than their baseline did; the
+    estimate is deterministic, so any increase counts.
+    """
+    previous = {
+        result_key(benchmark, result): result
+        for benchmark, entries in baseline["results"].items() for result in entries
+    }
+    regressions = 0
+    print(f"\nAgainst {baseline['commit']}:")
+    for benchmark, entries in results.items():
+        for result in entries:
+            base = previous.get(result_key(benchmark, result))
+            if base is None:
+                continue
+            before = base["seconds"]
+            ratio = result["seconds"] / before
+            regressed = ratio > 1 + threshold
+            label = " ".join(str(value) for _, value in result_key(benchmark, result)[1:])
+            output = ""
+            if "bytes_per_frame" in result and "bytes_per_frame" in base:
+                output = f"{base['bytes_per_frame']:>10.1f} -> {result['bytes_per_frame']:>8.1f} bytes"
+                regressed = regressed or result["bytes_per_frame"] > base["bytes_per_frame"]
+            regressions += regressed
+            print(f"{benchmark:<40}{label:<40}{before * 1e6:>12.3f} -> {result['seconds'] * 1e6:>12.3f} µs"
+                  f"{ratio:>8.2f}x{output}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmarks, print and save their results, and compare them to a baseline."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("filters", nargs="*", help="run only the benchmarks whose module.function contains one")
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("-c", "--compare", help="compare the results to those saved in this JSON file")
+    parser.add_argument("-t", "--threshold", type=float, default=THRESHOLD,
+                        help="slowdown reported as a regression, as a fraction (default %(default)s)")
+    args = parser.parse_args()
+
+    results = {}
+    start = time.perf_counter()
+    for module, function in find_benchmarks(args.filters):
+        benchmark = f"{module.__name__.split('.')[-1]}.{function.__name__}"
+        print(f"{benchmark}:")
+        results[benchmark] = function()
+        module.print_results(results[benchmark])
+
+    report = {
+        "commit": git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "seconds": time.perf_counter() - start,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=1)
+
+    if args.compare:
+        with open(args.compare) as file:
+            return 1 if compare(results, json.load(file), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+Minesweeper hot path benchmarks.
+
+Run from the repository root with `python -m benchmarks.bench_mine`.
+"""
+import os
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from mine_engine import (
+    COVERED_STATE, FLAGGED_STATE, Minefield, count_neighbours, flood_fill,
+    generate_boards
+)
+from mine_solver import generate_no_guess, solve
+
+BOARD_SIZES = (8, 64, 256, 1000, 2000)
+
+# Beginner, intermediate and expert boards as (rows, cols, num_mines)
+LEVELS = ((8, 8, 10), (16, 16, 40), (16, 30, 99))
+MINE_DENSITY = .16
+
+# Memory-mapped boards as (size, mine density), sparse enough for a poke in their middle to open a few lands or
+#  nearly all of them
+SPARSE_BOARDS = ((8000, .2), (4000, .05))
+
+# Most a fill may allocate and take per land it opens, beyond a small allowance: 16 bytes are the indices it returns
+FILL_BYTES, FILL_ALLOWANCE_BYTES = 24, 1 << 20
+FILL_SECONDS, FILL_ALLOWANCE_SECONDS = 1e-6, .05
+
+
+def random_mine_map(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Return a square mine map with `MINE_DENSITY` of its lands mined."""
+    return rng.random((size, size)) < MINE_DENSITY
+
+
+def bench_count_neighbours(sizes: tuple = BOARD_SIZES, repeat: int = 5) -> list:
+    """Time `count_neighbours` for each board size, keeping the best of `repeat` runs."""
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        mine_map = random_mine_map(size, rng)
+        number = max(1, 1_000_000 // (size * size))
+        best = min(timeit.repeat(lambda: count_neighbours(mine_map), number=number, repeat=repeat)) / number
+        results.append({"name": "count_neighbours", "rows": size, "cols": size, "seconds": best})
+    return results
+
+
+def bench_flood_fill(sizes: tuple = BOARD_SIZES, repeat: int = 5) -> list:
+    """Time `flood_fill` opening a mine-free board whole from its centre, keeping the best of `repeat` runs."""
+    results = []
+    for size in sizes:
+        solution_map = count_neighbours(np.zeros((size, size), dtype=bool))
+        state_map = np.full((size, size), COVERED_STATE, dtype=np.uint8)
+
+        def fill() -> None:
+            state_map[:, :] = COVERED_STATE
+            flood_fill(solution_map, state_map, size // 2, size // 2)
+
+        best = min(timeit.repeat(fill, number=1, repeat=repeat))
+        results.append({"name": "flood_fill", "rows": size, "cols": size, "seconds": best})
+    return results
+
+
+def bench_sparse_poke(boards: tuple = SPARSE_BOARDS) -> list:
+    """
+    Time poking the empty land nearest the middle of big memory-mapped boards, tracing the memory it allocates.
+
+    Raises `RuntimeError` if the poke allocates more than `FILL_BYTES` or takes more than `FILL_SECONDS` per land
+    it opens, beyond their allowances, as both should go with the size of the region opened, not of the board.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size, density in boards:
+            field = Minefield(size, size, int(size * size * density), rng, path=os.path.join(directory, "board"))
+            field.reset()
+            middle = size // 2
+            window = np.s_[middle:middle + 100, middle:middle + 100]
+            row, col = np.argwhere((field.solution_map[window] == 0) & ~field.mine_map[window])[0] + middle
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            opened = len(field.poke(row, col)[0])
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del field
+
+            if peak > FILL_BYTES * opened + FILL_ALLOWANCE_BYTES:
+                raise RuntimeError(f"Opening {opened} lands of a {size}x{size} board allocated {peak} bytes.")
+            if seconds > FILL_SECONDS * opened + FILL_ALLOWANCE_SECONDS:
+                raise RuntimeError(f"Opening {opened} lands of a {size}x{size} board took {seconds:.3f} s.")
+            results.append({"name": f"Minefield.poke {opened}", "rows": size, "cols": size, "seconds": seconds,
+                            "peak_mib": peak / 2 ** 20})
+    return results
+
+
+def bench_generate_boards(num_boards: int = 10_000, repeat: int = 3) -> list:
+    """Time `generate_boards` for a batch of beginner, intermediate and expert boards."""
+    rng = np.random.default_rng(0)
+    results = []
+    for rows, cols, num_mines in LEVELS:
+        best = min(timeit.repeat(lambda: generate_boards(num_boards, rows, cols, num_mines, rng),
+                                 number=1, repeat=repeat)) / num_boards
+        results.append({"name": "generate_boards", "rows": rows, "cols": cols, "seconds": best})
+    return results
+
+
+def bench_solve(num_boards: int = 200) -> list:
+    """Time `solve` playing beginner, intermediate and expert boards to completion, guessing when stuck."""
+    results = []
+    for rows, cols, num_mines in LEVELS:
+        field = Minefield(rows, cols, num_mines, np.random.default_rng(0))
+        wins = 0
+
+        def play() -> None:
+            nonlocal wins
+            for _ in range(num_boards):
+                field.reset()
+                wins += solve(field)
+
+        seconds = timeit.timeit(play, number=1) / num_boards
+        results.append({"name": "solve", "rows": rows, "cols": cols, "seconds": seconds,
+                        "win_rate": wins / num_boards})
+    return results
+
+
+def bench_arm(sizes: tuple = BOARD_SIZES[2:], repeat: int = 5) -> list:
+    """
+    Time placing the mines of safe-start boards on their first poke, with a tenth of their lands flagged before.
+
+    Raises `RuntimeError` if a flag does not survive the mines being placed.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for size in sizes:
+        field = Minefield(size, size, int(size * size * MINE_DENSITY), rng, safe_start=True)
+        flags = np.argwhere(rng.random((size, size)) < .1)
+
+        def setup() -> None:
+            field.reset()
+            for row, col in flags:
+                field.flag(row, col)
+
+        best = min(timeit.repeat(lambda: field.arm(size // 2, size // 2), setup=setup, number=1, repeat=repeat))
+        if np.count_nonzero(field.state_map == FLAGGED_STATE) != field.num_flagged or field.num_flagged != len(flags):
+            raise RuntimeError("Flags placed before the first poke were lost when placing mines.")
+        results.append({"name": "Minefield.arm", "rows": size, "cols": size, "seconds": best})
+    return results
+
+
+def bench_generate_no_guess(num_boards: int = 5) -> list:
+    """Time `generate_no_guess` for expert density boards, poked first in the middle."""
+    rng = np.random.default_rng(0)
+    results = []
+    for rows, cols in ((16, 30), (50, 50), (100, 100)):
+        num_mines = rows * cols * 99 // 480
+        seconds = timeit.timeit(lambda: generate_no_guess(rows, cols, num_mines, rows // 2, cols // 2, rng),
+                                number=num_boards) / num_boards
+        results.append({"name": "generate_no_guess", "rows": rows, "cols": cols, "seconds": seconds})
+    return results
+
+
+def print_results(results: list) -> None:
+    """Print benchmark results as an aligned table."""
+    for result in results:
+        rows, cols, seconds = result["rows"], result["cols"], result["seconds"]
+        print(f"{result['name']:<24}{rows:>6}x{cols:<6}{seconds * 1e3:>10.3f} ms{1 / seconds:>12.0f} /s"
+              f"{rows * cols / seconds / 1e6:>10.1f} Mcells/s")
+
+
+if __name__ == "__main__":
+    print_results(bench_count_neighbours())
+    print_results(bench_flood_fill())
+    print_results(bench_sparse_poke())
+    print_results(bench_generate_boards())
+    print_results(bench_solve())
+    print_results(bench_arm())
+    print_results(bench_generate_no_guess())
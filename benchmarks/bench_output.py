@@ -0,0 +1,138 @@
+"""
+Terminal output benchmarks, measuring what each game sends to the terminal per frame.
+
+Frames are drawn on the recording terminal of `benchmarks.fake_curses`, which estimates the bytes sent.
+
+Run from the repository root with `python -m benchmarks.bench_output`.
+"""
+import curses
+import random
+import timeit
+
+import gameboy
+from benchmarks.fake_curses import fake_curses
+from benchmarks.fake_nurses import play_minesweeper
+from pong import PongRenderer
+from pong_engine import DOWN_INPUT, UP_INPUT, PongGame
+from snake import SnakeRenderer
+from snake_engine import SnakeGame
+
+# Terminal sizes as (rows, columns)
+SCREEN_SIZES = ((24, 80), (50, 120))
+
+# Minesweeper boards as (rows, columns, mines), with fewer mines than the three digits of the mines left counter
+MINE_BOARDS = ((16, 30, 99), (50, 150, 999))
+
+
+def output_result(name: str, terminal: object, seconds: float) -> dict:
+    """Result of a benchmark from the frames its terminal recorded and the time they took."""
+    report = terminal.report()
+    return {"name": name, "count": report["frames"], "of": "frames", "seconds": seconds / report["frames"],
+            "bytes_per_frame": report["bytes_per_frame"], "cells_per_frame": report["cells_per_frame"],
+            "calls_per_frame": report["calls_per_frame"]}
+
+
+def bench_snake_output(sizes: tuple = SCREEN_SIZES, frames: int = 2_000) -> list:
+    """Measure the output of Snake games with random turns, one move per frame, starting a new game on losing."""
+    rng = random.Random(0)
+    results = []
+    for rows, columns in sizes:
+        with fake_curses(rows, columns) as terminal:
+            game = SnakeGame(rows, columns, rng)
+            renderer = SnakeRenderer(curses.newwin(rows, columns), game)
+
+            def run() -> None:
+                renderer.draw_all()
+                renderer.present()
+                for _ in range(frames - 1):
+                    last = game.step(rng.randrange(4))
+                    if game.over:
+                        game.reset()
+                        renderer.draw_all()
+                    else:
+                        renderer.draw_move(last)
+                    renderer.present()
+
+            seconds = timeit.timeit(run, number=1)
+            results.append(output_result(f"Snake {rows}x{columns}", terminal, seconds))
+    return results
+
+
+def bench_pong_output(sizes: tuple = SCREEN_SIZES, frames: int = 2_000) -> list:
+    """Measure the output of Pong matches with random player inputs, one step per frame."""
+    rng = random.Random(0)
+    results = []
+    for rows, columns in sizes:
+        with fake_curses(rows, columns) as terminal:
+            game = PongGame(random.Random(0), rows, columns)
+            renderer = PongRenderer(curses.newwin(rows, columns), game)
+
+            def run() -> None:
+                renderer.draw_all()
+                renderer.present()
+                for _ in range(frames - 1):
+                    player_input = rng.choice((UP_INPUT, DOWN_INPUT, None))
+                    if player_input:
+                        game.apply(player_input)
+                    game.step()
+                    if game.over:
+                        game.reset()
+                        renderer.draw_all()
+                    renderer.draw()
+                    renderer.present()
+
+            seconds = timeit.timeit(run, number=1)
+            results.append(output_result(f"Pong {rows}x{columns}", terminal, seconds))
+    return results
+
+
+def bench_minesweeper_output(boards: tuple = MINE_BOARDS, moves: int = 1_000) -> list:
+    """Measure the output of Minesweeper games with random moves, pokes and flags, one key per tick."""
+    results = []
+    for rows, cols, num_mines in boards:
+        terminal, manager = play_minesweeper(rows, cols, num_mines, moves)
+        seconds = sum(manager.task_seconds) + sum(manager.key_seconds)
+        results.append(output_result(f"Minesweeper {rows}x{cols}", terminal, seconds))
+    return results
+
+
+def bench_gameboy_output(sizes: tuple = SCREEN_SIZES) -> list:
+    """Measure the output of the launcher showing its menu, then following a resize to each of the other sizes."""
+    results = []
+    preload, gameboy.PRELOAD = gameboy.PRELOAD, False
+    gameboy.screen = None
+    try:
+        for rows, columns in sizes:
+            with fake_curses(rows, columns) as terminal:
+                terminal.stdscr.keys.append(gameboy.ESCAPE)
+                seconds = timeit.timeit(lambda: gameboy.main(terminal.stdscr), number=1)
+                results.append(output_result(f"gameboy menu {rows}x{columns}", terminal, seconds))
+
+                terminal.frames.clear()
+                start = timeit.default_timer()
+                for resized in sizes:
+                    if resized != (rows, columns):
+                        terminal.resize(*resized)
+                        gameboy.drawLauncher(terminal.stdscr)
+                        terminal.stdscr.refresh()
+                seconds = timeit.default_timer() - start
+                results.append(output_result(f"gameboy resize from {rows}x{columns}", terminal, seconds))
+    finally:
+        gameboy.PRELOAD = preload
+        gameboy.screen = None
+    return results
+
+
+def print_results(results: list) -> None:
+    """Print benchmark results as an aligned table."""
+    for result in results:
+        print(f"{result['name']:<28}{result['count']:>8} {result['of']:<7}"
+              f"{result['seconds'] * 1e6:>12.3f} µs/frame{result['bytes_per_frame']:>10.1f} bytes/frame"
+              f"{result['cells_per_frame']:>10.1f} cells/frame{result['calls_per_frame']:>8.1f} calls/frame")
+
+
+if __name__ == "__main__":
+    print_results(bench_snake_output())
+    print_results(bench_pong_output())
+    print_results(bench_minesweeper_output())
+    print_results(bench_gameboy_output())
@@ -0,0 +1,69 @@
+"""
+Pong hot path benchmarks.
+
+Run from the repository root with `python -m benchmarks.bench_pong`.
+"""
+import random
+import timeit
+
+import numpy as np
+
+from pong_engine import PongBatch, PongGame, PredictiveOpponent
+
+BATCH_SIZES = (1_000, 10_000, 100_000)
+
+
+def bench_pong_game(steps: int = 200_000, opponent: PredictiveOpponent = None) -> list:
+    """Time `PongGame.step` with an idle player, starting the next match whenever one is won."""
+    game = PongGame(random.Random(0), opponent=opponent)
+    points = 0
+
+    def run() -> None:
+        nonlocal points
+        for _ in range(steps):
+            game.step()
+            if game.over:
+                points += game.player + game.computer
+                game.reset()
+
+    seconds = timeit.timeit(run, number=1)
+    name = "PongGame.step" + (" predictive" if opponent else "")
+    return [{"name": name, "count": 1, "of": "match", "seconds": seconds / steps,
+             "points_per_second": (points + game.player + game.computer) / seconds}]
+
+
+def bench_pong_batch(batch_sizes: tuple = BATCH_SIZES, steps: int = 200,
+                     opponent: PredictiveOpponent = None) -> list:
+    """Time `PongBatch.step` per match step with idle players, restarting the matches that are won."""
+    rng = np.random.default_rng(0)
+    name = "PongBatch.step" + (" predictive" if opponent else "")
+    results = []
+    for num_matches in batch_sizes:
+        batch = PongBatch(num_matches, rng, opponent=opponent)
+        points = 0
+
+        def run() -> None:
+            nonlocal points
+            for _ in range(steps):
+                points += np.count_nonzero(batch.step())
+                batch.reset(batch.over)
+
+        seconds = timeit.timeit(run, number=1)
+        results.append({"name": name, "count": num_matches, "of": "matches",
+                        "seconds": seconds / (steps * num_matches), "points_per_second": points / seconds})
+    return results
+
+
+def print_results(results: list) -> None:
+    """Print benchmark results as an aligned table."""
+    for result in results:
+        seconds = result["seconds"]
+        print(f"{result['name']:<28}{result['count']:>8} {result['of']:<8}"
+              f"{seconds * 1e6:>10.3f} µs/step{1 / seconds:>14.0f} /s{result['points_per_second']:>12.0f} points/s")
+
+
+if __name__ == "__main__":
+    print_results(bench_pong_game())
+    print_results(bench_pong_batch())
+    print_results(bench_pong_game(opponent=PredictiveOpponent(reaction=2, error=.5)))
+    print_results(bench_pong_batch(opponent=PredictiveOpponent(reaction=2, error=.5)))
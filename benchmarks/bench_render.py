@@ -0,0 +1,131 @@
+"""
+Drawing benchmarks, on the in-process stand-in for curses windows of `benchmarks.fake_curses`.
+
+Run from the repository root with `python -m benchmarks.bench_render`.
+"""
+import random
+import statistics
+import timeit
+
+import gameboy
+from benchmarks.fake_curses import FakeWindow, fake_curses
+from benchmarks.fake_nurses import play_minesweeper
+from pong import PongRenderer
+from pong_engine import DOWN_INPUT, UP_INPUT, PongGame
+from snake import SnakeRenderer
+from snake_engine import SnakeBody, SnakeGame
+
+LENGTHS = (3, 100, 1_000, 10_000)
+FRAME_COUNTS = (100, 1_000, 10_000)
+
+# Terminal sizes as (rows, columns)
+SCREEN_SIZES = ((24, 80), (50, 120), (200, 400))
+
+# Minesweeper boards as (rows, columns, mines), with fewer mines than the three digits of the mines left counter
+MINE_BOARDS = ((16, 30, 99), (50, 150, 999))
+
+
+def bench_snake_renderer(lengths: tuple = LENGTHS, frames: int = 10_000, repeat: int = 3) -> list:
+    """Time drawing a whole Snake game and drawing one move of the snake, for each snake length."""
+    results = []
+    with fake_curses():
+        for length in lengths:
+            # A straight snake along a row, with room to slither right for every frame
+            game = SnakeGame(5, length + frames + 3, random.Random(0))
+            renderer = SnakeRenderer(FakeWindow(game.height, game.width), game)
+
+            def place() -> None:
+                game.body = SnakeBody([(2, x) for x in range(length, 0, -1)])
+
+            def move() -> None:
+                for x in range(length + 1, length + frames + 1):
+                    renderer.draw_move(game.body.move((2, x)))
+                    renderer.present()
+
+            place()
+            best = min(timeit.repeat(renderer.draw_all, number=1, repeat=repeat))
+            results.append({"name": "SnakeRenderer.draw_all", "count": length, "of": "long", "seconds": best})
+            best = min(timeit.repeat(move, setup=place, number=1, repeat=repeat)) / frames
+            results.append({"name": "SnakeRenderer.draw_move", "count": length, "of": "long", "seconds": best})
+    return results
+
+
+def bench_pong_renderer(frame_counts: tuple = FRAME_COUNTS, sizes: tuple = SCREEN_SIZES[:2], repeat: int = 3) -> list:
+    """Time Pong frames, a step of the match with a random input and its drawing, for each arena size."""
+    rng = random.Random(0)
+    results = []
+    with fake_curses():
+        for rows, columns in sizes:
+            for frames in frame_counts:
+                game = PongGame(random.Random(0), rows, columns)
+                renderer = PongRenderer(FakeWindow(rows, columns), game)
+                renderer.draw_all()
+                inputs = [rng.choice((UP_INPUT, DOWN_INPUT, None)) for _ in range(frames)]
+
+                def run() -> None:
+                    for player_input in inputs:
+                        if player_input:
+                            game.apply(player_input)
+                        game.step()
+                        if game.over:
+                            game.reset()
+                            renderer.draw_all()
+                        renderer.draw()
+                        renderer.present()
+
+                best = min(timeit.repeat(run, number=1, repeat=repeat)) / frames
+                results.append({"name": f"Pong frame {rows}x{columns}", "count": frames, "of": "frames",
+                                "seconds": best})
+    return results
+
+
+def bench_gameboy(sizes: tuple = SCREEN_SIZES[1:], repeat: int = 20) -> list:
+    """Time drawing the gameboy and its menu from scratch, and from the cached pad, for each terminal size."""
+    results = []
+    with fake_curses():
+        for rows, columns in sizes:
+            window = FakeWindow(rows, columns)
+
+            def draw() -> None:
+                gameboy.createGameboy(window)
+                gameboy.writeMenu(window)
+
+            best = min(timeit.repeat(draw, number=1, repeat=repeat))
+            results.append({"name": f"gameboy draw {rows}x{columns}", "count": 1, "of": "screen", "seconds": best})
+
+            gameboy.screen = None
+            gameboy.drawGameboy(window)
+            best = min(timeit.repeat(lambda: gameboy.drawGameboy(window), number=1, repeat=repeat))
+            results.append({"name": f"drawGameboy {rows}x{columns}", "count": 1, "of": "screen", "seconds": best})
+        gameboy.screen = None
+    return results
+
+
+def bench_lawn(boards: tuple = MINE_BOARDS, moves: int = 1_000) -> list:
+    """
+    Time the ticks of a Minesweeper game, which refresh the lands changed, and its keys, for each board.
+
+    The game gets a random move, poke or flag every tick; medians leave out the first poke placing the mines.
+    """
+    results = []
+    for rows, cols, num_mines in boards:
+        _, manager = play_minesweeper(rows, cols, num_mines, moves)
+        for name, seconds in (("tick", manager.task_seconds), ("key", manager.key_seconds)):
+            results.append({"name": f"Lawn {name} {rows}x{cols}", "count": len(seconds), "of": f"{name}s",
+                            "seconds": statistics.median(seconds)})
+    return results
+
+
+def print_results(results: list) -> None:
+    """Print benchmark results as an aligned table."""
+    for result in results:
+        seconds = result["seconds"]
+        print(f"{result['name']:<28}{result['count']:>8} {result['of']:<7}"
+              f"{seconds * 1e6:>12.3f} µs/call{1 / seconds:>14.0f} /s")
+
+
+if __name__ == "__main__":
+    print_results(bench_snake_renderer())
+    print_results(bench_pong_renderer())
+    print_results(bench_gameboy())
+    print_results(bench_lawn())
@@ -0,0 +1,125 @@
+"""
+Snake hot path benchmarks.
+
+Run from the repository root with `python -m benchmarks.bench_snake`.
+"""
+import random
+import timeit
+
+import numpy as np
+
+from snake_engine import FreeCells, SnakeBatch, SnakeBody, SnakeGame
+
+LENGTHS = (3, 100, 1_000, 10_000, 100_000)
+FILLS = (0, .5, .9, .99, .999)
+BATCH_SIZES = (1_000, 10_000, 100_000)
+
+
+def bench_snake_body(lengths: tuple = LENGTHS, ticks: int = 100_000, repeat: int = 5) -> list:
+    """Time `SnakeBody.move` and its self-collision check per tick for each snake length."""
+    results = []
+    for length in lengths:
+        body = SnakeBody([(0, x) for x in range(length, 0, -1)])
+
+        def run() -> None:
+            # Slither along the row, never crashing
+            y, x = body.head
+            for step in range(1, ticks + 1):
+                body.move((y, x + step))
+                assert not body.crashed
+
+        best = min(timeit.repeat(run, number=1, repeat=repeat)) / ticks
+        results.append({"name": "SnakeBody.move", "count": length, "of": "long", "seconds": best})
+    return results
+
+
+def bench_snake_list(lengths: tuple = LENGTHS, ticks: int = 1_000, repeat: int = 3) -> list:
+    """Time the former list body, with `insert(0, ...)` and a scan of the copied body, per tick for comparison."""
+    results = []
+    for length in lengths:
+        body = [[0, x] for x in range(length, 0, -1)]
+
+        def run() -> None:
+            y, x = body[0]
+            for step in range(1, ticks + 1):
+                body.insert(0, [y, x + step])
+                body.pop()
+                assert body[0] not in body[1:]
+
+        best = min(timeit.repeat(run, number=1, repeat=repeat)) / ticks
+        results.append({"name": "list body", "count": length, "of": "long", "seconds": best})
+    return results
+
+
+def bench_food(size: int = 500, fills: tuple = FILLS, samples: int = 10_000, repeat: int = 3) -> list:
+    """Time sampling a free food cell from `FreeCells`, and by retrying random cells, as the snake fills the arena."""
+    rng = random.Random(0)
+    cells = [(y, x) for y in range(size) for x in range(size)]
+    rng.shuffle(cells)
+
+    results = []
+    free_cells, covered = FreeCells(size, size), set()
+    for fill in fills:
+        for cell in cells[len(covered):int(fill * size * size)]:
+            free_cells.discard(cell)
+            covered.add(cell)
+
+        def retry() -> tuple:
+            while True:
+                cell = rng.randrange(size), rng.randrange(size)
+                if cell not in covered:
+                    return cell
+
+        for name, sample in (("FreeCells.sample", free_cells.sample), ("retry", retry)):
+            best = min(timeit.repeat(sample, number=samples, repeat=repeat)) / samples
+            results.append({"name": name, "count": len(covered), "of": "long", "seconds": best})
+    return results
+
+
+def bench_snake_game(size: int = 20, steps: int = 100_000) -> list:
+    """Time `SnakeGame.step` with random turns, starting the next game whenever one ends."""
+    rng = random.Random(0)
+    game = SnakeGame(size, size, rng)
+
+    def run() -> None:
+        for _ in range(steps):
+            game.step(rng.randrange(4))
+            if game.over:
+                game.reset()
+
+    seconds = timeit.timeit(run, number=1) / steps
+    return [{"name": "SnakeGame.step", "count": 1, "of": "game", "seconds": seconds}]
+
+
+def bench_snake_batch(size: int = 20, batch_sizes: tuple = BATCH_SIZES, steps: int = 50) -> list:
+    """Time `SnakeBatch.step` with random turns per game step, restarting the games that end."""
+    rng = np.random.default_rng(0)
+    results = []
+    for num_games in batch_sizes:
+        batch = SnakeBatch(num_games, size, size, rng)
+        turns = rng.integers(-1, 4, size=(steps, num_games))
+
+        def run() -> None:
+            for directions in turns:
+                batch.step(directions)
+                batch.reset(batch.over)
+
+        seconds = timeit.timeit(run, number=1) / (steps * num_games)
+        results.append({"name": "SnakeBatch.step", "count": num_games, "of": "games", "seconds": seconds})
+    return results
+
+
+def print_results(results: list) -> None:
+    """Print benchmark results as an aligned table."""
+    for result in results:
+        seconds = result["seconds"]
+        print(f"{result['name']:<24}{result['count']:>8} {result['of']:<6}"
+              f"{seconds * 1e6:>12.3f} µs/call{1 / seconds:>14.0f} /s")
+
+
+if __name__ == "__main__":
+    print_results(bench_snake_body())
+    print_results(bench_snake_list())
+    print_results(bench_food())
+    print_results(bench_snake_game())
+    print_results(bench_snake_batch())
@@ -0,0 +1,413 @@
+"""
+In-process stand-in for curses, so drawing code can be timed and its terminal output measured without a terminal.
+
+`fake_curses` patches the module-level curses functions and constants the games use, which otherwise need
+`curses.initscr` and a real terminal. `FakeWindow` keeps a window as rows of (character, attributes) cells,
+raising `curses.error` where curses would. Windows of a `Terminal` are composed on its screen when refreshed,
+like curses does, and each update of the terminal records the calls made since the previous one, the cells it
+changed and an estimate of the bytes a terminal would be sent for them.
+
+The estimate follows what ncurses sends an xterm-256color terminal: the shortest of an absolute, row only, column
+only, backspace or newline move to each run of changed cells, or rewriting the few unchanged cells in between;
+colors set one SGR sequence per foreground and background; a reset and the original colors whenever attributes
+are turned off; a charset switch around line drawing characters, and the UTF-8 bytes of the characters. It ignores
+the line insertion, deletion and erasing optimizations of ncurses, so it may overestimate scrolling or mostly
+blank screens.
+"""
+import curses
+from collections import Counter
+from contextlib import contextmanager
+
+# Line drawing characters, with the codes ncurses gives them in the alternate character set
+ACS = {
+    "ACS_BLOCK": ord("0"), "ACS_DIAMOND": ord("`"), "ACS_CKBOARD": ord("a"), "ACS_BULLET": ord("~"),
+    "ACS_HLINE": ord("q"), "ACS_VLINE": ord("x"), "ACS_ULCORNER": ord("l"), "ACS_URCORNER": ord("k"),
+    "ACS_LLCORNER": ord("m"), "ACS_LRCORNER": ord("j"),
+}
+BORDER = ("ACS_VLINE", "ACS_VLINE", "ACS_HLINE", "ACS_HLINE",
+          "ACS_ULCORNER", "ACS_URCORNER", "ACS_LLCORNER", "ACS_LRCORNER")
+
+BLANK = (" ", 0)
+
+# Bytes of clearing the screen, "\x1b[H\x1b[2J", of switching between the normal and line drawing charsets,
+# "\x1b(0" and "\x1b(B", of resetting attributes and restoring the original colors, "\x1b(B\x1b[m\x1b[39;49m",
+# of setting the colors of a pair, "\x1b[3xm\x1b[4xm", and of turning on one of the `SGR_FLAGS`, "\x1b[nm"
+CLEAR_BYTES = 7
+CHARSET_BYTES = 3
+RESET_BYTES = 14
+COLOR_BYTES = 10
+FLAG_BYTES = 4
+SGR_FLAGS = (curses.A_BOLD, curses.A_DIM, curses.A_UNDERLINE, curses.A_BLINK, curses.A_REVERSE, curses.A_INVIS)
+
+
+def split_chtype(ch: object, attr: int = 0) -> tuple:
+    """Split a character given as a string or a chtype, and attributes, into a cell."""
+    if isinstance(ch, str):
+        return ch, attr
+    return chr(ch & curses.A_CHARTEXT), ch & ~curses.A_CHARTEXT | attr
+
+
+def move_bytes(cursor: tuple, y: int, x: int) -> int:
+    """
+    Bytes of the shortest move of the cursor to (y, x).
+
+    Rows and columns count from 1 in "\x1b[y;xH", "\x1b[yd" in the same column and "\x1b[xG" on the same row; a
+    backspace moves one cell left and "\r\n" to the start of the next row.
+    """
+    cost = 4 + len(str(y + 1)) + len(str(x + 1))
+    if cursor is not None:
+        cursor_y, cursor_x = cursor
+        if cursor_x == x:
+            cost = min(cost, 3 + len(str(y + 1)))
+        if cursor_y == y:
+            cost = min(cost, 1 if cursor_x == x + 1 else 3 + len(str(x + 1)))
+        elif cursor_y + 1 == y and x == 0:
+            cost = min(cost, 2)
+    return cost
+
+
+def flags(attr: int) -> int:
+    """Count of the `SGR_FLAGS` of attributes."""
+    return sum(bool(attr & flag) for flag in SGR_FLAGS)
+
+
+def cell_bytes(cell: tuple) -> int:
+    """Bytes of the character of a cell; line drawing characters are sent as single bytes."""
+    char, attr = cell
+    return 1 if attr & curses.A_ALTCHARSET else len(char.encode())
+
+
+class Terminal:
+    """
+    Screen of a terminal, on which refreshed windows are composed.
+
+    Each `doupdate` sends the changes of the screen since the previous one, recording in `frames` the calls
+    made to the windows since then, the cells changed and the estimated bytes sent.
+    """
+
+    def __init__(self, rows: int = 24, cols: int = 80) -> None:
+        self.rows, self.cols = rows, cols
+        # What the windows put on the screen, and what the terminal shows
+        self.screen = [[BLANK] * cols for _ in range(rows)]
+        self.shown = [[BLANK] * cols for _ in range(rows)]
+        self.changed = set()
+        self.cleared = True
+        self.cursor = None
+        self.attr = 0
+
+        self.calls = Counter()
+        self.frames = []
+        self.stdscr = FakeWindow(rows, cols, terminal=self)
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Resize the terminal and its standard screen, queuing `KEY_RESIZE` as curses does."""
+        self.rows, self.cols = rows, cols
+        self.screen = [[BLANK] * cols for _ in range(rows)]
+        self.shown = [[BLANK] * cols for _ in range(rows)]
+        self.cleared = True
+        self.stdscr.resize(rows, cols)
+        self.stdscr.keys.append(curses.KEY_RESIZE)
+
+    def compose(self, window: "FakeWindow") -> None:
+        """Put the rows a window changed since it was last refreshed on the screen."""
+        if window.cleared:
+            window.cleared = False
+            self.cleared = True
+        for row in window.touched:
+            y = window.y + row
+            if 0 <= y < self.rows:
+                width = min(window.cols, self.cols - window.x)
+                self.screen[y][window.x:window.x + width] = window.cells[row][:width]
+                self.changed.add(y)
+        window.touched.clear()
+
+    def doupdate(self) -> dict:
+        """Send the changes of the screen to the terminal, and record them as a frame."""
+        sent = cells = 0
+        if self.cleared:
+            self.cleared = False
+            sent += CLEAR_BYTES
+            self.shown = [[BLANK] * self.cols for _ in range(self.rows)]
+            self.changed = set(range(self.rows))
+            self.cursor = 0, 0
+
+        for y in sorted(self.changed):
+            screen, shown = self.screen[y], self.shown[y]
+            if screen == shown:
+                continue
+            for x, cell in enumerate(screen):
+                if cell == shown[x]:
+                    continue
+                sent += self.move(y, x) + self.switch(cell[1]) + cell_bytes(cell)
+                shown[x] = cell
+                cells += 1
+                # The cursor stays put after the last column, on terminals where it wraps as anywhere else
+                self.cursor = (y, x + 1) if x + 1 < self.cols else None
+        self.changed.clear()
+
+        frame = {"bytes": sent, "cells": cells, "calls": dict(self.calls)}
+        self.frames.append(frame)
+        self.calls.clear()
+        return frame
+
+    def move(self, y: int, x: int) -> int:
+        """Bytes of getting the cursor to a cell, moving it or rewriting the cells up to it when shorter."""
+        if self.cursor == (y, x):
+            return 0
+        cost = move_bytes(self.cursor, y, x)
+        if self.cursor is not None and self.cursor[0] == y and self.cursor[1] < x:
+            between = self.shown[y][self.cursor[1]:x]
+            if all(attr == self.attr for _, attr in between):
+                cost = min(cost, sum(map(cell_bytes, between)))
+        return cost
+
+    def switch(self, attr: int) -> int:
+        """Bytes of switching the terminal to the attributes of the next cell."""
+        previous, self.attr = self.attr, attr
+        if attr == previous:
+            return 0
+        cost = 0
+        # Turning attributes or colors off takes resetting them all
+        if previous & ~attr & ~curses.A_COLOR & ~curses.A_ALTCHARSET or previous & curses.A_COLOR and not (
+                attr & curses.A_COLOR):
+            cost += RESET_BYTES + COLOR_BYTES
+            previous &= ~curses.A_ALTCHARSET & ~curses.A_COLOR
+            previous &= attr
+        elif (attr ^ previous) & curses.A_COLOR:
+            cost += COLOR_BYTES
+        if (attr ^ previous) & curses.A_ALTCHARSET:
+            cost += CHARSET_BYTES
+        return cost + FLAG_BYTES * flags(attr & ~previous)
+
+    def text(self) -> list:
+        """Characters of each row the terminal shows, for checking what was drawn."""
+        return ["".join(char for char, _ in row) for row in self.shown]
+
+    def report(self) -> dict:
+        """Totals and means per frame of the frames recorded so far."""
+        frames = len(self.frames) or 1
+        calls = Counter()
+        for frame in self.frames:
+            calls.update(frame["calls"])
+        total_bytes = sum(frame["bytes"] for frame in self.frames)
+        total_cells = sum(frame["cells"] for frame in self.frames)
+        return {
+            "frames": len(self.frames), "bytes": total_bytes, "cells": total_cells, "calls": dict(calls),
+            "bytes_per_frame": total_bytes / frames, "cells_per_frame": total_cells / frames,
+            "calls_per_frame": sum(calls.values()) / frames,
+        }
+
+
+class FakeWindow:
+    """
+    A curses window or pad drawn on in memory, optionally on a `Terminal`.
+
+    Keys to read can be queued in `keys`; reading a key while none is queued returns -1 without delay, and
+    raises `EOFError` in delay mode, where curses would wait forever.
+    """
+
+    def __init__(self, rows: int, cols: int, y: int = 0, x: int = 0, pad: bool = False,
+                 terminal: Terminal = None) -> None:
+        self.rows, self.cols = rows, cols
+        self.y, self.x = y, x
+        self.pad = pad
+        self.terminal = terminal
+        self.cells = [[BLANK] * cols for _ in range(rows)]
+        # Rows changed since the window was last refreshed, and whether it was cleared
+        self.touched = set(range(rows))
+        self.cleared = False
+        self.keys = []
+        self.delay = True
+        self.refreshes = 0
+
+    def count(self, call: str) -> None:
+        """Count a call made to the window, if it is on a terminal."""
+        if self.terminal is not None:
+            self.terminal.calls[call] += 1
+
+    def getmaxyx(self) -> tuple:
+        """Size of the window."""
+        return self.rows, self.cols
+
+    def getbegyx(self) -> tuple:
+        """Position of the window on the screen."""
+        return self.y, self.x
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Change the size of the window, keeping what fits of its cells."""
+        self.cells = [(row[:cols] + [BLANK] * (cols - len(row)))[:cols] for row in self.cells[:rows]]
+        self.cells += [[BLANK] * cols for _ in range(rows - len(self.cells))]
+        self.rows, self.cols = rows, cols
+        self.touched = set(range(rows))
+
+    def put(self, y: int, x: int, cell: tuple) -> None:
+        """Set a cell, failing like curses outside the window, or after drawing its last cell."""
+        if not (0 <= y < self.rows and 0 <= x < self.cols):
+            raise curses.error("addch() returned ERR")
+        self.cells[y][x] = cell
+        self.touched.add(y)
+        # The cursor cannot move on from the last cell
+        if y == self.rows - 1 and x == self.cols - 1:
+            raise curses.error("addch() returned ERR")
+
+    def addch(self, y: int, x: int, ch: object, attr: int = 0) -> None:
+        """Draw a character."""
+        self.count("addch")
+        self.put(y, x, split_chtype(ch, attr))
+
+    def addstr(self, y: int, x: int, text: str, attr: int = 0) -> None:
+        """Draw a string from a position."""
+        self.count("addstr")
+        for i, char in enumerate(text):
+            self.put(y, x + i, (char, attr))
+
+    def addnstr(self, y: int, x: int, text: str, n: int, attr: int = 0) -> None:
+        """Draw at most `n` characters of a string."""
+        self.count("addnstr")
+        for i, char in enumerate(text[:n]):
+            self.put(y, x + i, (char, attr))
+
+    def hline(self, y: int, x: int, ch: object, n: int) -> None:
+        """Draw a horizontal line, cut at the edge of the window."""
+        self.count("hline")
+        cell = split_chtype(ch)
+        row = self.cells[y]
+        row[x:x + n] = [cell] * len(row[x:x + n])
+        self.touched.add(y)
+
+    def border(self, *chars: object) -> None:
+        """Draw a border around the window, with the default characters for those not given or 0."""
+        self.count("border")
+        ls, rs, ts, bs, tl, tr, bl, br = (
+            split_chtype(char or ACS[name] | curses.A_ALTCHARSET)
+            for char, name in zip(chars + (0,) * (8 - len(chars)), BORDER)
+        )
+        last_y, last_x = self.rows - 1, self.cols - 1
+        self.cells[0][1:last_x] = [ts] * (last_x - 1)
+        self.cells[last_y][1:last_x] = [bs] * (last_x - 1)
+        for y in range(1, last_y):
+            self.cells[y][0], self.cells[y][last_x] = ls, rs
+        self.cells[0][0], self.cells[0][last_x] = tl, tr
+        self.cells[last_y][0], self.cells[last_y][last_x] = bl, br
+        self.touched.update(range(self.rows))
+
+    def erase(self) -> None:
+        """Blank the window."""
+        self.count("erase")
+        for row in self.cells:
+            row[:] = [BLANK] * self.cols
+        self.touched.update(range(self.rows))
+
+    def clear(self) -> None:
+        """Blank the window, and have the whole terminal cleared and drawn again on the next refresh."""
+        self.erase()
+        self.cleared = True
+
+    def overwrite(self, dest: "FakeWindow", *area: int) -> None:
+        """Copy the window onto another, whole or as overwrite(dest, sminrow, smincol, dminrow, dmincol, ...)."""
+        self.count("overwrite")
+        self.copy(dest, area, blanks=True)
+
+    def overlay(self, dest: "FakeWindow", *area: int) -> None:
+        """Copy the window onto another like `overwrite`, leaving the cells under its blanks as they were."""
+        self.count("overlay")
+        self.copy(dest, area, blanks=False)
+
+    def copy(self, dest: "FakeWindow", area: tuple, blanks: bool) -> None:
+        """Copy cells onto another window for `overwrite` and `overlay`, failing like curses outside it."""
+        if area:
+            sminrow, smincol, dminrow, dmincol, dmaxrow, dmaxcol = area
+        else:
+            sminrow = smincol = dminrow = dmincol = 0
+            dmaxrow, dmaxcol = min(self.rows, dest.rows) - 1, min(self.cols, dest.cols) - 1
+        if dminrow < 0 or dmincol < 0 or dmaxrow >= dest.rows or dmaxcol >= dest.cols:
+            raise curses.error("copywin() returned ERR")
+        width = dmaxcol - dmincol + 1
+        for i in range(dmaxrow - dminrow + 1):
+            cells = self.cells[sminrow + i][smincol:smincol + width]
+            row = dest.cells[dminrow + i]
+            if blanks:
+                row[dmincol:dmincol + width] = cells
+            else:
+                for x, cell in enumerate(cells, dmincol):
+                    if cell[0] != " ":
+                        row[x] = cell
+        dest.touched.update(range(dminrow, dmaxrow + 1))
+
+    def noutrefresh(self) -> None:
+        """Put the changes of the window on the terminal screen, for the next update of the terminal."""
+        self.count("noutrefresh")
+        self.refreshes += 1
+        if self.terminal is not None:
+            self.terminal.compose(self)
+
+    def refresh(self) -> None:
+        """Put the changes of the window on the terminal screen and update the terminal."""
+        self.noutrefresh()
+        if self.terminal is not None:
+            self.terminal.doupdate()
+
+    def getch(self) -> int:
+        """Read the next queued key, after refreshing the window as curses does."""
+        self.refresh()
+        if self.keys:
+            return self.keys.pop(0)
+        if self.delay:
+            raise EOFError("no key is queued for a window waiting for one")
+        return -1
+
+    def nodelay(self, flag: bool) -> None:
+        """Make reading keys return -1 when none is queued, or wait for one."""
+        self.delay = not flag
+
+    def keypad(self, flag: bool) -> None:
+        """Ignored, as keys are queued already decoded."""
+
+    timeout = keypad
+
+    def text(self) -> list:
+        """Characters of each row of the window, for checking what was drawn."""
+        return ["".join(char for char, _ in row) for row in self.cells]
+
+
+def attach(widget: object, terminal: Terminal) -> FakeWindow:
+    """
+    Give a nurses widget, such as an ArrayWin, a window on a terminal instead of its curses window.
+
+    The window has a spare column, so that the last cell of the widget can be drawn, and the calls the widget
+    makes to it, e.g. in the `refresh` of the Minesweeper lawn, are counted with the frames of the terminal. It
+    reaches the screen by being copied onto the window of the widget's parent, as nurses widgets do.
+    """
+    widget.window = FakeWindow(widget.height, widget.width + 1, widget.top, widget.left, terminal=terminal)
+    return widget.window
+
+
+def ignore(*args: object) -> None:
+    """Stand in for terminal setup functions, which have nothing to do here."""
+
+
+@contextmanager
+def fake_curses(rows: int = 24, cols: int = 80) -> iter:
+    """Patch the curses module so games draw on `FakeWindow`s of a new `Terminal`, restoring it afterwards."""
+    terminal = Terminal(rows, cols)
+    patches = {
+        "initscr": lambda: terminal.stdscr, "doupdate": terminal.doupdate,
+        "newwin": lambda rows, cols, y=0, x=0: FakeWindow(rows, cols, y, x, terminal=terminal),
+        "newpad": lambda rows, cols: FakeWindow(rows, cols, pad=True),
+        "color_pair": lambda number: number << 8,
+        "curs_set": ignore, "start_color": ignore, "use_default_colors": ignore, "init_pair": ignore,
+        "noecho": ignore, "echo": ignore, "cbreak": ignore, "nocbreak": ignore, "endwin": ignore,
+        **{name: code | curses.A_ALTCHARSET for name, code in ACS.items()},
+    }
+    missing = object()
+    saved = {name: getattr(curses, name, missing) for name in patches}
+    for name, value in patches.items():
+        setattr(curses, name, value)
+    try:
+        yield terminal
+    finally:
+        for name, value in saved.items():
+            if value is missing:
+                delattr(curses, name)
+            else:
+                setattr(curses, name, value)
@@ -0,0 +1,239 @@
+"""
+In-process stand-in for the parts of nurses the Minesweeper game uses, drawing on `benchmarks.fake_curses`.
+
+nurses is not a declared dependency, so `fake_nurses` puts this module in its place while curses is patched by
+`fake_curses`, and `mine` imported then uses it. Widgets are placed by `top`, `left`, `height` and `width` within
+their parent, and draw on windows given by `attach`. Refreshing a widget refreshes its children and copies their
+windows onto its own, transparent ones without their blanks; refreshing the root updates the terminal, so each
+frame of the game is recorded by its `Terminal`.
+
+`ScreenManager.run` plays in virtual time: every `STEP` seconds it runs the scheduled callbacks that are due,
+then the next key queued on the standard screen, until Esc or the last key. It waits for the threads a key
+starts, such as the one placing mines on the first poke, so what is drawn does not depend on how fast they run,
+and records the seconds spent on each step's callbacks and key.
+"""
+import curses
+import importlib
+import random
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+import numpy as np
+
+from benchmarks.fake_curses import attach, fake_curses
+
+# Virtual seconds between two keys
+STEP = .1
+
+ESCAPE = 27
+
+# Keys of the random moves of `play_minesweeper`: arrows twice as often as pokes and flags
+MOVES = (curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT) * 2 + (ord(" "), ord("f"))
+
+# Screen managers made since `fake_nurses` was entered, for benchmarks to read their timings
+MANAGERS = []
+
+
+class Widget:
+    """Part of the screen at (`top`, `left`) of its parent, drawn with its children on a window of its own."""
+
+    def __init__(self, top: int = 0, left: int = 0, height: int = 1, width: int = 1, color: int = 0,
+                 parent: "Widget" = None, transparent: bool = False) -> None:
+        self.top, self.left = top, left
+        self.height, self.width = height, width
+        self.color = color
+        self.parent = parent
+        self.transparent = transparent
+        self.children = []
+        self.window = None
+
+    def new_widget(self, *args, create_with: object = None, **kwargs) -> "Widget":
+        """Add a child widget, of the class or the name of a class given, on a window of the same terminal."""
+        if isinstance(create_with, str):
+            create_with = WIDGETS[create_with]
+        widget = (create_with or Widget)(*args, parent=self, **kwargs)
+        attach(widget, self.window.terminal)
+        self.children.append(widget)
+        return widget
+
+    def on_press(self, key: int) -> bool:
+        """Offer a key to the children, the last added first, until one handles it."""
+        return any(child.on_press(key) for child in reversed(self.children))
+
+    def refresh(self) -> None:
+        """Refresh the children and copy them onto the window, then update the terminal if this is the root."""
+        for child in self.children:
+            child.refresh()
+            copy = child.window.overlay if child.transparent else child.window.overwrite
+            copy(self.window, 0, 0, child.top, child.left, child.top + child.height - 1,
+                 child.left + child.width - 1)
+        if self.parent is None:
+            self.window.refresh()
+
+
+class ArrayWin(Widget):
+    """Widget drawn from an array of characters and an array of their colors."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buffer = np.full((self.height, self.width), " ", dtype=object)
+        self.colors = np.full((self.height, self.width), self.color)
+
+    def __getitem__(self, key: tuple) -> object:
+        return self.buffer[key]
+
+    def __setitem__(self, key: tuple, text: object) -> None:
+        # A string sets one character per cell
+        self.buffer[key] = tuple(text) if isinstance(text, str) and len(text) > 1 else text
+
+    def refresh(self) -> None:
+        """Draw every cell of the buffer, then refresh the widget."""
+        for (row, col), char in np.ndenumerate(self.buffer):
+            self.window.addstr(row, col, str(char), self.colors[row, col])
+        super().refresh()
+
+
+WIDGETS = {"Widget": Widget, "ArrayWin": ArrayWin}
+
+
+class ColorPairs:
+    """Color pairs by name, e.g. `RED_ON_BLACK`, numbered in the order they are first used."""
+
+    def __init__(self) -> None:
+        self.pairs = {}
+
+    def __getattr__(self, name: str) -> int:
+        if "_ON_" not in name:
+            raise AttributeError(name)
+        return curses.color_pair(self.pairs.setdefault(name, len(self.pairs) + 1))
+
+
+class Task:
+    """Callback run by a `ScreenManager` every `delay` seconds, `n` times or until cancelled."""
+
+    def __init__(self, manager: "ScreenManager", callback: callable, delay: float, n: int) -> None:
+        self.manager = manager
+        self.callback = callback
+        self.delay = delay
+        self.n = n
+        self.due = manager.now + delay
+
+    def run(self) -> None:
+        """Run the callback, and schedule its next run if any."""
+        self.callback()
+        self.due += self.delay
+        if self.n is not None:
+            self.n -= 1
+            if not self.n:
+                self.cancel()
+
+    def cancel(self) -> None:
+        """Stop running the callback."""
+        if self in self.manager.tasks:
+            self.manager.tasks.remove(self)
+
+
+class ScreenManager:
+    """Root widget on the standard screen, with the callbacks scheduled on it, playing the queued keys."""
+
+    def __init__(self) -> None:
+        window = curses.initscr()
+        self.root = Widget(0, 0, *window.getmaxyx())
+        self.root.window = window
+        self.tasks = []
+        self.now = 0.
+        # Seconds spent on the callbacks and on the key of each step
+        self.task_seconds = []
+        self.key_seconds = []
+        MANAGERS.append(self)
+
+    def __enter__(self) -> "ScreenManager":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        curses.endwin()
+
+    def schedule(self, callback: callable, delay: float = 0, n: int = None) -> Task:
+        """Run a callback every `delay` seconds, `n` times or until the returned task is cancelled."""
+        task = Task(self, callback, delay, n)
+        self.tasks.append(task)
+        return task
+
+    def run(self) -> None:
+        """Play the keys queued on the standard screen, one per step, after the callbacks due at each step."""
+        keys = self.root.window.keys
+        while True:
+            self.now += STEP
+            start = time.perf_counter()
+            for task in list(self.tasks):
+                # Tasks cancelled by an earlier one of the step do not run
+                if task in self.tasks and task.due <= self.now + STEP / 2:
+                    task.run()
+            self.task_seconds.append(time.perf_counter() - start)
+
+            if not keys or keys[0] == ESCAPE:
+                break
+            threads = set(threading.enumerate())
+            start = time.perf_counter()
+            self.root.on_press(keys.pop(0))
+            for thread in set(threading.enumerate()) - threads:
+                thread.join()
+            self.key_seconds.append(time.perf_counter() - start)
+
+
+@contextmanager
+def fake_nurses(rows: int = 24, cols: int = 80) -> iter:
+    """Put the stand-in in place of nurses, with curses patched by `fake_curses`, yielding its terminal."""
+    nurses = types.ModuleType("nurses")
+    nurses.ScreenManager, nurses.Widget, nurses.colors = ScreenManager, Widget, ColorPairs()
+    keys = types.ModuleType("nurses.keys")
+    keys.UP, keys.DOWN, keys.LEFT, keys.RIGHT = curses.KEY_UP, curses.KEY_DOWN, curses.KEY_LEFT, curses.KEY_RIGHT
+    widgets = types.ModuleType("nurses.widgets")
+    widgets.ArrayWin = ArrayWin
+    modules = {"nurses": nurses, "nurses.keys": keys, "nurses.widgets": widgets}
+
+    # Games importing nurses are imported again, with the stand-in, and forgotten afterwards
+    saved = {name: sys.modules.pop(name, None) for name in (*modules, "mine")}
+    MANAGERS.clear()
+    with fake_curses(rows, cols) as terminal:
+        sys.modules.update(modules)
+        try:
+            yield terminal
+        finally:
+            for name, module in saved.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+
+
+def play_minesweeper(rows: int, cols: int, num_mines: int, moves: int, seed: int = 0) -> tuple:
+    """
+    Play Minesweeper on the stand-in, poking the centre of the board first, then making `moves` random moves.
+
+    Returns the terminal and the screen manager of the game, once checked that the terminal shows the lawn.
+    """
+    rng = random.Random(seed)
+    # The session draws its seed from the random module
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        # Room for the lawn, the scoreboard below it and the overlay on its right
+        with fake_nurses(rows + 10, cols + 90) as terminal:
+            terminal.stdscr.keys += [curses.KEY_DOWN] * (rows // 2) + [curses.KEY_RIGHT] * (cols // 2)
+            terminal.stdscr.keys += [ord(" ")] + [rng.choice(MOVES) for _ in range(moves)] + [ESCAPE]
+            importlib.import_module("mine").playMinesweeper(rows=rows, cols=cols, num_mines=num_mines)
+    finally:
+        random.setstate(state)
+
+    manager = MANAGERS[-1]
+    lawn = next(child for child in manager.root.children if hasattr(child, "session"))
+    shown = [row[lawn.left:lawn.left + lawn.width] for row in terminal.text()[lawn.top:lawn.top + lawn.height]]
+    # Only the cell under the cursor differs
+    wrong = sum(char != str(land) for row, lands in zip(shown, lawn.buffer) for char, land in zip(row, lands))
+    if wrong > 1:
+        raise RuntimeError(f"The terminal shows {wrong} lands of the {rows}x{cols} lawn wrong")
+    return terminal, manager
@@ -1,11 +1,57 @@
 import curses
 import curses.ascii
+import importlib
+import threading
 import time
+from contextlib import suppress
 
-from mine import playMinesweeper
-from nurses.keys import BACKSPACE, ESCAPE
-from pong import playPong
-from snake import playSnake
+ESCAPE = curses.ascii.ESC
+
+# Whether games are imported in the background while the menu waits for a key
+PRELOAD = True
+
+
+class Game:
+    """
+    A game on the menu, started by its key.
+
+    The module of its entry point, with NumPy, nurses and whatever else it needs, is only imported when the game
+    is loaded, so the menu comes up without paying for games that are not played.
+    """
+
+    def __init__(self, key: int, name: str, module: str, entry: str) -> None:
+        self.key = key
+        self.name = name
+        self.module = module
+        self.entry = entry
+
+    def load(self) -> callable:
+        """Import the game's module, if not done yet, and return its entry point."""
+        return getattr(importlib.import_module(self.module), self.entry)
+
+
+# Games on the menu by their key
+GAMES = {}
+
+
+def register(key: str, name: str, module: str, entry: str) -> None:
+    """Put a game on the menu, given the name of its module and entry point."""
+    GAMES[ord(key)] = Game(ord(key), name, module, entry)
+
+
+register('1', "Snake", "snake", "playSnake")
+register('2', "Pong", "pong", "playPong")
+register('3', "MineSweeper", "mine", "playMinesweeper")
+
+
+def preload() -> None:
+    """Import every game in a background thread, leaving any import error to be raised when the game is played."""
+    def run() -> None:
+        for game in GAMES.values():
+            with suppress(Exception):
+                game.load()
+
+    threading.Thread(target=run, name="preload", daemon=True).start()
 
 
 def init():
@@ -20,10 +66,17 @@ def init():
     curses.init_pair(9, curses.COLOR_BLACK, curses.COLOR_GREEN)
 
 
-def create_box(stdscr, x, y, x2, y2, color):
+# Size of the gameboy, which is centred on the terminal
+GAMEBOY_HEIGHT, GAMEBOY_WIDTH = 40, 50
+
+# Pad the gameboy and its menu are drawn on once, to be copied to the terminal at any size
+screen = None
+
+
+def create_box(stdscr: object, x: int, y: int, x2: int, y2: int, color: int) -> None:
+    """Fill the box from (y, x) up to (y2, x2) with blocks of a color pair, a whole row per call."""
     for y3 in range(y, y2):
-        for x3 in range(x, x2):
-            stdscr.addch(y3, x3, curses.ACS_BLOCK, curses.color_pair(color))
+        stdscr.hline(y3, x, curses.ACS_BLOCK | curses.color_pair(color), x2 - x)
 
 
 def createGameboy(stdscr):
@@ -54,9 +107,7 @@ def writeMenu(stdscr):
     h1 = h//2-20
     w2 = w//2+25
     h2 = h//2+20
-    for x in range(w1+4, w2-4):
-        for y in range(h1+3, h1+13):
-            stdscr.addch(y, x, curses.ACS_BLOCK, curses.color_pair(2))
+    create_box(stdscr, w1+4, h1+3, w2-4, h1+13, 2)  # green play area
 
     # draw box surrounding snake game
     stdscr.addstr(h1+4, w1+7, "┌", curses.color_pair(9))
@@ -132,35 +183,80 @@ def writeMenu(stdscr):
     stdscr.addstr(h1+11, w1+8, "Thinking inside boxes®", curses.color_pair(9))
 
 
+def drawGameboy(stdscr: object) -> None:
+    """Draw the gameboy and its menu centred on the window, copying them from a pad drawn on the first call."""
+    global screen
+    if screen is None:
+        # a pad of the gameboy's size puts it at the origin; a spare row and column keep its corner off the last cell
+        screen = curses.newpad(GAMEBOY_HEIGHT + 1, GAMEBOY_WIDTH + 1)
+        createGameboy(screen)
+        writeMenu(screen)
+
+    h, w = stdscr.getmaxyx()
+    h1 = h//2-GAMEBOY_HEIGHT//2
+    w1 = w//2-GAMEBOY_WIDTH//2
+    screen.overwrite(stdscr, 0, 0, h1, w1, h1+GAMEBOY_HEIGHT-1, w1+GAMEBOY_WIDTH-1)
+
+
+def drawLauncher(stdscr: object, notice: str = None) -> None:
+    """Draw the gameboy, or ask for a larger terminal if it does not fit, with a notice on the last row if any."""
+    h, w = stdscr.getmaxyx()
+    stdscr.erase()
+    if h < GAMEBOY_HEIGHT or w < GAMEBOY_WIDTH:
+        message = "Please enlarge the terminal to {}x{} (now {}x{}), or press Esc to quit.".format(
+            GAMEBOY_WIDTH, GAMEBOY_HEIGHT, w, h)
+        # the message is cut to what fits, away from the last cell
+        stdscr.addnstr(h//2, 0, message, w-1)
+    else:
+        drawGameboy(stdscr)
+    if notice:
+        stdscr.addnstr(h-1, 0, notice, w-1)
+
+
 def main(stdscr):
-    key = None
-
-    curses.initscr()
-    stdscr.keypad(True)
-    curses.curs_set(0)
-    curses.start_color()
-
-    curses.curs_set(0)
-    init()
-    createGameboy(stdscr)
-    writeMenu(stdscr)
-    key = stdscr.getch()
-
-    if key == ord('1'):
-        stdscr.clear()
-        playSnake()
-    elif key == ord('2'):
-        stdscr.clear()
-        playPong()
-    elif key == ord('3'):
-        stdscr.clear()
-        playMinesweeper()
-    elif key == ESCAPE:
-        pass
-
-
-try:
+    preloading = not PRELOAD
+    # why the last game stopped, if it failed
+    notice = None
+
+    # launcher loop, coming back to the menu after each game until Esc is pressed
+    while True:
+        # games leave curses with their own settings and colors, which are set again for the menu
+        curses.noecho()
+        curses.cbreak()
+        stdscr.keypad(True)
+        stdscr.nodelay(False)
+        curses.curs_set(0)
+        init()
+        drawLauncher(stdscr, notice)
+
+        # games are imported once the first frame of the menu is out, while waiting for a key
+        if not preloading:
+            stdscr.refresh()
+            preload()
+            preloading = True
+
+        key = stdscr.getch()
+        # after a resize the cached gameboy is only copied to its new place
+        while key == curses.KEY_RESIZE:
+            drawLauncher(stdscr, notice)
+            key = stdscr.getch()
+
+        if key == ESCAPE:
+            break
+        h, w = stdscr.getmaxyx()
+        if key in GAMES and h >= GAMEBOY_HEIGHT and w >= GAMEBOY_WIDTH:
+            game, notice = GAMES[key], None
+            # a game that fails, or misses what it needs such as nurses, comes back to the menu showing why
+            try:
+                play = game.load()
+                stdscr.clear()
+                stdscr.refresh()
+                play()
+            except Exception as error:
+                notice = "{} stopped: {}: {}".format(game.name, type(error).__name__, error)
+            # the game drew over the whole screen, which is repainted from scratch
+            stdscr.clear()
+
+
+if __name__ == "__main__":
     curses.wrapper(main)
-except Exception as e:
-    print(e)
-    print("Your screen resolution might be too small to render all game elements. Please try running in fullscreen.")
@@ -0,0 +1,71 @@
+import curses
+import time
+
+# Most simulation steps run in one frame to catch up after a slow frame; any further backlog is dropped
+MAX_CATCH_UP = 5
+
+
+def present(*windows: object) -> None:
+    """Send what changed on the windows since their last refresh to the terminal in a single update."""
+    for window in windows:
+        window.noutrefresh()
+    curses.doupdate()
+
+
+class GameLoop:
+    """
+    Fixed-timestep game clock for a curses window.
+
+    Simulation steps are due every 1 / `tick_rate` seconds whatever the frame or input rate. Each frame drains
+    all pending keys without blocking, reports how many steps are due, then sleeps until the next step.
+    """
+
+    def __init__(self, window: object, tick_rate: float, max_catch_up: int = MAX_CATCH_UP,
+                 clock: callable = time.perf_counter, sleep: callable = time.sleep) -> None:
+        self.window = window
+        self.timestep = 1 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        self.restart()
+
+    def restart(self) -> None:
+        """Start counting time afresh, e.g. after blocking on a menu, so no steps are due for the pause."""
+        self.previous = self.clock()
+        self.lag = 0.
+        # Steps dropped in the latest frame
+        self.dropped = 0
+
+    def drain_keys(self) -> list:
+        """Read every pending key without waiting."""
+        self.window.nodelay(1)
+        keys = []
+        key = self.window.getch()
+        while key != -1:
+            keys.append(key)
+            key = self.window.getch()
+        return keys
+
+    def frames(self) -> iter:
+        """Yield the keys pressed and the count of simulation steps due for each frame, forever."""
+        while True:
+            now = self.clock()
+            self.lag += now - self.previous
+            self.previous = now
+
+            # Allow for rounding, as sleeping exactly until a step is due may wake a hair early
+            steps = int(self.lag / self.timestep + 1e-6)
+            if steps > self.max_catch_up:
+                self.dropped = steps - self.max_catch_up
+                steps = self.max_catch_up
+                self.lag %= self.timestep
+            else:
+                self.dropped = 0
+                self.lag -= steps * self.timestep
+
+            yield self.drain_keys(), steps
+
+            # Sleep rather than spin until the next step is due
+            wait = self.timestep - self.lag - (self.clock() - self.previous)
+            if wait > 0:
+                self.sleep(wait)
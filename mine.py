@@ -1,21 +1,38 @@
 
+import curses
+import threading
+from contextlib import suppress
+
 import numpy as np
 
 from nurses import ScreenManager, Widget, colors
 from nurses.keys import DOWN, LEFT, RIGHT, UP
 from nurses.widgets import ArrayWin
 
+from mine_engine import FLAGGED_STATE, UNCOVERED_STATE
+from mine_solver import Solver
+from perf import OVERLAY_KEY, FrameTimer
+from replay import (
+    FLAG_ACTION, POKE_ACTION, RESET_ACTION, Session, minesweeper_input
+)
+
+
+def playMinesweeper(replay_path: str = None, rows: int = 8, cols: int = 8, num_mines: int = 10) -> None:
+    """
+    Wrapper function englobing all MineSweeper code, saving the session to `replay_path` if given.
 
-def playMinesweeper() -> None:
-    """Wrapper function englobing all MineSweeper code."""
+    The board has `rows` by `cols` lands and `num_mines` mines.
+    """
     # Keybindings
     SPACE_KEY, RESET_KEY = ord(' '), ord('r')
     FORFEIT_KEY = ord('g')
     FLAG_KEY = ord('f')
+    HINT_KEY = ord('h')
 
     # Miscs
     OFFSET_TOP, OFFSET_LEFT = 5, 25
     DELTA = .1
+    OVERLAY_WIDTH = 60
 
     # Symbols
     COVERED_SYMBOL = '❑'
@@ -28,10 +45,8 @@ def playMinesweeper() -> None:
     BOXEDCHECK_SYMBOL = '☑'
     BOXEDCROSS_SYMBOL = '☒'
 
-    # States
-    COVERED_STATE = 0
-    UNCOVERED_STATE = 1
-    FLAGGED_STATE = 2
+    # Glyph of each adjacent mine count, looked up only when rendering
+    SOLUTION_SYMBOLS = np.array([EMPTY_SYMBOL, *'12345678'])
 
     class Cursor(Widget):
         """Movable cursor to point to a land location."""
@@ -79,34 +94,49 @@ def playMinesweeper() -> None:
                 self.top = (self.top - self.offset_top) % self.wrap_height + self.offset_top
             if self.wrap_width:
                 self.left = (self.left - self.offset_left) % self.wrap_width + self.offset_left
+
+            lawn.stale = True
             return True
 
     class Lawn(ArrayWin):
         """MineSweeper Game Board."""
 
-        def __init__(self, rows: int, cols: int, num_mines: int,
-                     scoreboard: ArrayWin, gsm: ScreenManager, *args, **kwargs) -> None:
+        def __init__(self, rows: int, cols: int, num_mines: int, scoreboard: ArrayWin, perf_overlay: ArrayWin,
+                     gsm: ScreenManager, *args, **kwargs) -> None:
 
             # Initialize display from ArrayWin
             super().__init__(OFFSET_TOP, OFFSET_LEFT, rows, cols, *args, **kwargs)
 
-            self._shape = rows, cols
-            self._num_mines = num_mines
-
-            # Game board records the state of each cell
-            self._state_map = np.zeros((rows, cols)).astype(int)
+            # Display-free game board holding mines and land states, recorded for replay, with mines placed on
+            #  the first poke so that the game is never lost on the first poke and never needs a guess
+            self.session = Session("minesweeper", params=(rows, cols, num_mines, True))
+            self._field = self.session.create()
+            self._ticks = 0
 
-            # Initialize with given mine amount
-            self._mine_map = np.r_[np.full(rows * cols - num_mines, False), np.full(num_mines, True)]
-            self._solution_map = np.zeros((rows, cols)).astype(int)
+            # First poke waiting for its mines to be placed in the background, with the thread placing them
+            self._arming = None
 
             # Scoreboard display scores and shoutout banner
             self.scoreboard = scoreboard
 
+            # Timings of the update and refresh of each tick, shown on the overlay with OVERLAY_KEY
+            self.perf_overlay = perf_overlay
+            self.frame_timer = FrameTimer(DELTA, "minesweeper")
+            self._overlay_text = None
+
             # Game ScreenManager, useful for scheduling animation task
             self._gsm = gsm
             self._marching_task = None
 
+            # Lands changed since the last refresh, and whether anything on screen changed
+            self._dirty = np.ones((rows, cols), dtype=bool)
+            self.stale = True
+
+        def __setitem__(self, key: tuple, text: str) -> None:
+            super().__setitem__(key, text)
+            self._dirty[key] = True
+            self.stale = True
+
         def schedule_marching(self, delay: int = .3) -> None:
             """Use ScreenManager handle to animate scoreboard text."""
 
@@ -116,6 +146,7 @@ def playMinesweeper() -> None:
                 tail = self.scoreboard[1, 1:]
                 self.scoreboard[1, :-1] = tail
                 self.scoreboard[1, -1] = head
+                self.stale = True
 
             self._marching_task = self._gsm.schedule(marching_scoreboard, delay=delay, n=120)
 
@@ -126,15 +157,12 @@ def playMinesweeper() -> None:
             # Display the game board
             self.revealed = False
 
-            # Clear the game board
-            self._state_map[:, :] = COVERED_STATE
-
-            # Randomize mine locations
-            self._mine_map = self._mine_map.reshape(-1)
-            np.random.shuffle(self._mine_map)
-            self._mine_map = self._mine_map.reshape(self._shape)
-
-            self._solution_map = self.build_solution()
+            # Clear the exploded mine color and the game board, and randomize mine locations
+            if self._field.lost:
+                self.colors[self._field.exploded] = self.color
+            self._field.reset()
+            self.record(RESET_ACTION)
+            self._solver = Solver(self._field)
 
             # Erase shoutout text
             self.scoreboard[:, :] = ' '
@@ -145,50 +173,91 @@ def playMinesweeper() -> None:
             # Unset timer
             self.timer = None
 
-        def build_solution(self) -> np.ndarray:
-            """Count mines near each land in adjacent lands."""
-            rows, cols = self._shape
-            solution_map = np.zeros((rows, cols)).astype(int)
-
-            for r in range(rows):
-                for c in range(cols):
-                    solution_map[r, c] = self._mine_map[
-                        max(0, r - 1):min(r + 2, rows),
-                        max(0, c - 1):min(c + 2, cols)
-                    ].sum()
-
-            solution_map = solution_map.astype(str)
-            solution_map[solution_map == '0'] = EMPTY_SYMBOL
-            return solution_map
-
         def reveal_mines(self) -> None:
             """Reveal all mine locations."""
             if not self.revealed:
                 self.revealed = True
-                self[:, :] = np.where(self._mine_map, MINE_SYMBOL, self[:, :])
-
-        def refresh(self) -> None:
-            """Handle terminal display refresh."""
+                self[np.nonzero(self._field.mine_map)] = MINE_SYMBOL
+
+        def record(self, action: int, row: int = 0, col: int = 0) -> None:
+            """Record an action of the player for replaying the session."""
+            self.session.record(self._ticks, minesweeper_input(action, row, col, self._field.shape[1]))
+
+        def tick(self) -> None:
+            """Advance timer, then refresh the screen if anything changed."""
+            self.frame_timer.begin()
+            self._ticks += 1
+            if self._arming is not None:
+                self.wait_armed()
             if self.timer and not self.revealed:
-                # Timer on the right of scoreboard
-                self.scoreboard[0, -3:] = str(int(self.timer)).rjust(3, '0')
+                # Timer on the right of scoreboard, only drawn when its shown seconds change
+                if int(self.timer + DELTA) != int(self.timer):
+                    self.scoreboard[0, -3:] = str(int(self.timer + DELTA)).rjust(3, '0')
+                    self.stale = True
                 self.timer += DELTA
+            if self.frame_timer.overlay:
+                self.draw_overlay()
+            self.frame_timer.mark("update")
+
+            if self.stale:
+                self.stale = False
+                self._gsm.root.refresh()
+                self.frame_timer.mark("draw")
+            self.frame_timer.end()
+
+        def draw_overlay(self) -> None:
+            """Show the frame timings on the overlay, or blank it once hidden, only when its text changes."""
+            lines = self.frame_timer.lines() if self.frame_timer.overlay else ['', '']
+            text = [line[:OVERLAY_WIDTH].ljust(OVERLAY_WIDTH, ' ') for line in lines]
+            if text != self._overlay_text:
+                self._overlay_text = text
+                for i, line in enumerate(text):
+                    self.perf_overlay[i, :] = line
+                self.stale = True
 
-                # Flagging count on the left
-                self.scoreboard[0, :3] = str(self._num_mines - (self._state_map == FLAGGED_STATE).sum()).rjust(3, '0')
-
-            return super().refresh()
+        def refresh(self) -> None:
+            """Draw the lands changed since the last refresh, then refresh the widget like any other."""
+            for row, col in zip(*np.nonzero(self._dirty)):
+                # Writing to the lower right corner raises an error once the cursor moves past the window
+                with suppress(curses.error):
+                    self.window.addstr(row, col, str(self.buffer[row, col]), self.colors[row, col])
+            self._dirty[:, :] = False
+
+            # Skip the refresh of ArrayWin, which draws the whole buffer again, but not the refresh it builds on
+            super(ArrayWin, self).refresh()
+
+        def draw_flag_count(self) -> None:
+            """Display the count of mines left to flag on the left of scoreboard."""
+            if self.timer and not self.revealed:
+                self.scoreboard[0, :3] = str(self._field.mines_left).rjust(3, '0')
+                self.stale = True
 
         def on_press(self, key: int) -> bool:
             """Handle key press events."""
+            if key == OVERLAY_KEY:
+                self.frame_timer.toggle()
+                self.draw_overlay()
+                return True
+
+            self.stale = True
+
+            # Keys wait while the mines are placed, so they apply to the board in the order they were recorded
+            if self._arming is not None:
+                return True
+
             # Initialize timer
             if not self.timer:
                 self.timer = DELTA
                 self.scoreboard[1, :] = ' '
                 self._marching_task.cancel()
+                self.draw_flag_count()
 
             if key == FORFEIT_KEY:
-                self.reveal_mines()
+                # There are no mines to reveal until the first poke places them
+                if self._field.armed:
+                    self.reveal_mines()
+                else:
+                    self.scoreboard[1, :8] = "Poke 1st"
 
             elif key == RESET_KEY:
                 self.init_lawn()
@@ -200,6 +269,9 @@ def playMinesweeper() -> None:
                 if key == FLAG_KEY:
                     self.flag()
 
+                if key == HINT_KEY:
+                    self.hint()
+
             else:
                 return super().on_press(key)
             return True
@@ -207,48 +279,69 @@ def playMinesweeper() -> None:
         def flag(self) -> None:
             """Flag the location for potential mine."""
             row, col = cursor.top - OFFSET_TOP, cursor.left - OFFSET_LEFT
-            if self._state_map[row, col] == COVERED_STATE:
-                self._state_map[row, col] = FLAGGED_STATE
-                self[row, col] = FLAG_SYMBOL
-            elif self._state_map[row, col] == FLAGGED_STATE:
-                self._state_map[row, col] = COVERED_STATE
-                self[row, col] = COVERED_SYMBOL
+            self.record(FLAG_ACTION, row, col)
+            if self._field.flag(row, col):
+                self[row, col] = FLAG_SYMBOL if self._field.state_map[row, col] == FLAGGED_STATE else COVERED_SYMBOL
+                self.draw_flag_count()
 
         def poke(self) -> None:
             """Uncover the pointed location."""
             row, col = cursor.top - OFFSET_TOP, cursor.left - OFFSET_LEFT
-            rows, cols = self._shape
-
-            def uncover_land(r: int, c: int) -> None:
-                """Uncover adjacent locations when the adjacent mine count is 0."""
-                if not (0 <= r < rows and 0 <= c < cols) or state_map[r, c] == UNCOVERED_STATE:
-                    return
-                state_map[r, c] = UNCOVERED_STATE
-
-                # Uncover the 8 adjacent locations
-                if self._solution_map[r, c] == EMPTY_SYMBOL:
-                    for rr in range(r - 1, r + 2):
-                        for cc in range(c - 1, c + 2):
-                            if not (rr == r and cc == c):
-                                uncover_land(rr, cc)
-
-            if self._state_map[row, col] != COVERED_STATE:
+            self.record(POKE_ACTION, row, col)
+
+            # Placing mines so that the game needs no guess can take a second on big boards, so the first
+            #  poke is played once they are placed in the background, while the screen keeps refreshing
+            if not self._field.armed and self._field.state_map[row, col] != FLAGGED_STATE:
+                thread = threading.Thread(target=self._field.arm, args=(row, col), name="arm", daemon=True)
+                self._arming = row, col, thread
+                thread.start()
+                self.scoreboard[1, :8] = "Mining  "
                 return
+            self.uncover(row, col)
 
-            if self._mine_map[row, col]:
+        def wait_armed(self) -> None:
+            """Play the first poke once its mines are placed, showing progress until then."""
+            row, col, thread = self._arming
+            if thread.is_alive():
+                self.scoreboard[1, :8] = ("Mining" + "." * (self._ticks // 3 % 3)).ljust(8, ' ')
+                return
+
+            self._arming = None
+            self.scoreboard[1, :8] = ' ' * 8
+            self.uncover(row, col)
+
+        def uncover(self, row: int, col: int) -> None:
+            """Uncover a land of the board, redrawing the lands it opened."""
+            opened = self._field.poke(row, col)
+            self._solver.notice(opened)
+
+            if self._field.lost:
                 self.lose(row, col)
-            else:
-                state_map = self._state_map.copy()
-                uncover_land(row, col)
-                self._state_map = state_map
-                self[:, :] = np.where(self._state_map == UNCOVERED_STATE, self._solution_map, self[:, :])
+            elif len(opened[0]):
+                # Only redraw the lands that were just uncovered
+                self[opened] = SOLUTION_SYMBOLS[self._field.solution_map[opened]]
+                self.draw_flag_count()
                 self.evaluate()
 
+        def hint(self) -> None:
+            """Point the cursor to a land deduced to be safe or mined, or to the safest guess."""
+            hint = self._solver.hint()
+            if hint is None:
+                return
+
+            row, col, is_mine = hint
+            cursor.top, cursor.left = row + OFFSET_TOP, col + OFFSET_LEFT
+            if is_mine:
+                self.scoreboard[1, :8] = "Mine!   "
+            elif (row, col) in self._solver.safe:
+                self.scoreboard[1, :8] = "Safe!   "
+            else:
+                self.scoreboard[1, :8] = "Guess!  "
+
         def win(self) -> None:
             """Handle winning."""
-            # Replace good flags with boxed check marks, and all other locations with solutions
-            self[:, :] = np.where(self._mine_map,
-                                  BOXEDCHECK_SYMBOL, self._solution_map)
+            # Replace good flags with boxed check marks; all other locations are already uncovered
+            self[np.nonzero(self._field.mine_map)] = BOXEDCHECK_SYMBOL
 
             # Put up smiley and winning shoutout
             self.scoreboard[0, len(self.scoreboard[0]) // 2] = HAPPYFACE_SYMBOL
@@ -260,15 +353,17 @@ def playMinesweeper() -> None:
         def lose(self, r: int, c: int) -> None:
             """Handle losing."""
             # Replace good flags with boxed check marks, bad flags with boxed crosses,
-            #  and all other locations with solutions
-            self[:, :] = np.where(self._mine_map,
-                                  np.where(self._state_map == FLAGGED_STATE, BOXEDCHECK_SYMBOL, MINE_SYMBOL),
-                                  np.where(self._state_map == FLAGGED_STATE, BOXEDCROSS_SYMBOL, self._solution_map))
+            #  and all other covered locations with solutions
+            covered = np.nonzero(self._field.state_map != UNCOVERED_STATE)
+            flagged = self._field.state_map[covered] == FLAGGED_STATE
+            self[covered] = np.where(self._field.mine_map[covered],
+                                     np.where(flagged, BOXEDCHECK_SYMBOL, MINE_SYMBOL),
+                                     np.where(flagged, BOXEDCROSS_SYMBOL,
+                                              SOLUTION_SYMBOLS[self._field.solution_map[covered]]))
 
             # Color exploded mine
-            colors_copy = np.full(self._shape, self.color)
-            colors_copy[r, c] = colors.WHITE_ON_RED
-            self.colors = colors_copy
+            self.colors[r, c] = colors.WHITE_ON_RED
+            self._dirty[r, c] = True
 
             # Put up sad face and losing callout
             self.scoreboard[0, len(self.scoreboard[0]) // 2] = SADFACE_SYMBOL
@@ -279,18 +374,10 @@ def playMinesweeper() -> None:
 
         def evaluate(self) -> None:
             """Evaluate winning or losing."""
-            # If all and only all mines are covered, win
-            if np.all(self._mine_map == (self._state_map != UNCOVERED_STATE)):
+            if self._field.won:
                 self.win()
-            # Otherwise, if the number of covered cells matches the number of mines, lose
-            elif (self._state_map != UNCOVERED_STATE).sum() == self._num_mines:
-                row, col = cursor.top - OFFSET_TOP, cursor.left - OFFSET_LEFT
-                self.lose(row, col)
 
     with ScreenManager() as gsm:
-        num_mines = 10
-        rows, cols = 8, 8
-
         text_len = 20
 
         # Draw the scoreboard on the bottom
@@ -298,24 +385,40 @@ def playMinesweeper() -> None:
                                          color=colors.RED_ON_BLACK, create_with="ArrayWin")
 
         # Draw instructions on the side
-        instructions = gsm.root.new_widget(OFFSET_TOP, OFFSET_LEFT + cols + 2, height=6, width=text_len,
+        instructions = gsm.root.new_widget(OFFSET_TOP, OFFSET_LEFT + cols + 2, height=7, width=text_len,
                                            color=colors.YELLOW_ON_BLACK, create_with="ArrayWin")
         instructions[0, :] = 'r: reset game'.ljust(text_len, ' ')
         instructions[1, :] = 'g: give up game'.ljust(text_len, ' ')
         instructions[2, :] = '␣: uncover location'.ljust(text_len, ' ')
         instructions[3, :] = 'f: flag mine'.ljust(text_len, ' ')
         instructions[4, :] = 'arrows: move pointer'.ljust(text_len, ' ')
-        instructions[5, :] = 'esc: leave game'.ljust(text_len, ' ')
+        instructions[5, :] = 'h: hint next move'.ljust(text_len, ' ')
+        instructions[6, :] = 'esc: leave game'.ljust(text_len, ' ')
+
+        # Frame timings below the instructions, shown with OVERLAY_KEY
+        perf_overlay = gsm.root.new_widget(OFFSET_TOP + 8, OFFSET_LEFT + cols + 2, height=2, width=OVERLAY_WIDTH,
+                                           color=colors.YELLOW_ON_BLACK, create_with="ArrayWin")
 
         # Draw board
         lawn = gsm.root.new_widget(rows=rows, cols=cols, num_mines=num_mines,
-                                   scoreboard=scoreboard, gsm=gsm, create_with=Lawn)
+                                   scoreboard=scoreboard, perf_overlay=perf_overlay, gsm=gsm, create_with=Lawn)
         lawn.init_lawn()
 
         # Draw Cursor
         cursor = gsm.root.new_widget(rows, cols, OFFSET_TOP, OFFSET_LEFT, 1, 1, transparent=True, create_with=Cursor)
         cursor.window.addstr(0, 0, CURSOR_SYMBOL)
 
-        # Schedule refreshing task
-        gsm.schedule(gsm.root.refresh, delay=DELTA)
+        # Schedule refreshing task, skipping frames where nothing changed
+        gsm.schedule(lawn.tick, delay=DELTA)
         gsm.run()
+
+    # A first poke still waiting for its mines is recorded, so play it on the board before the session ends,
+    #  without drawing on the screen that is gone
+    if lawn._arming is not None:
+        row, col, thread = lawn._arming
+        thread.join()
+        lawn._field.poke(row, col)
+    lawn.session.finish(lawn._ticks, lawn._field)
+    if replay_path:
+        lawn.session.save(replay_path)
+    lawn.frame_timer.export()
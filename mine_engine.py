@@ -0,0 +1,512 @@
+import struct
+
+import numpy as np
+
+# States
+COVERED_STATE = 0
+UNCOVERED_STATE = 1
+FLAGGED_STATE = 2
+EXPLODED_STATE = 3
+
+# Layout of a packed land byte: adjacent mine count in bits 0-3, mine in bit 4, state in bits 5-6
+COUNT_SHIFT, COUNT_MASK = 0, 0b1111
+MINE_SHIFT, MINE_MASK = 4, 0b1
+STATE_SHIFT, STATE_MASK = 5, 0b11
+
+# Lands processed at once when writing a whole board, so huge boards never need full-size temporaries
+BAND_LANDS = 1 << 22
+
+# Saved game boards start with a header holding what their lands do not tell before mines are placed: a magic
+#  string and version, the board size, the mine count and whether mines are placed on the first poke. The land
+#  bytes follow in row-major order
+BOARD_MAGIC = b"MINE"
+BOARD_VERSION = 1
+BOARD_HEADER = struct.Struct("<4sBqqq?")
+
+
+def count_neighbours(mine_map: np.ndarray) -> np.ndarray:
+    """
+    Count mines in the 8 adjacent lands of every land.
+
+    Works on a single board of shape (rows, cols) or on a stack of boards of shape (..., rows, cols),
+    by summing the 8 shifted views of a zero-padded copy of the mine map in one vectorized pass.
+    """
+    padded = np.pad(mine_map.astype(np.uint8), [(0, 0)] * (mine_map.ndim - 2) + [(1, 1), (1, 1)])
+    rows, cols = mine_map.shape[-2:]
+
+    counts = np.zeros(mine_map.shape, dtype=np.uint8)
+    for dr in range(3):
+        for dc in range(3):
+            if dr == dc == 1:
+                continue
+            counts += padded[..., dr:dr + rows, dc:dc + cols]
+    return counts
+
+
+# Row and column indices of no land at all
+NO_LANDS = np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+# Offsets to the 8 adjacent lands, as (8, 1) columns to broadcast against lands
+NEIGHBOUR_ROWS = np.array([-1, -1, -1, 0, 0, 1, 1, 1])[:, None]
+NEIGHBOUR_COLS = np.array([-1, 0, 1, -1, 1, -1, 0, 1])[:, None]
+
+
+# Rows and columns on each side of a poked land first searched for the region it opens; the searched area
+#  doubles towards each side the region reaches, so a fill only reads about the bounding box of its region
+REGION_MARGIN = 16
+
+
+def label_runs(mask: np.ndarray) -> tuple:
+    """
+    Group the lands set in a mask in runs along rows, and label the 8-connected regions the runs form.
+
+    Each run is joined to the runs it touches in the row above, diagonals included, by a vectorized union-find,
+    which hooks the larger root of each join onto the smaller one and then compresses every path, until each join
+    lies within one region. Returns the flat indices of the first and last land of each run, in row-major order,
+    and the label of each run, the first run of its region.
+    """
+    cols = mask.shape[1]
+    edges = mask.copy()
+    edges[:, 1:] &= ~mask[:, :-1]
+    run_starts = np.flatnonzero(edges)
+    edges[:, :] = mask
+    edges[:, :-1] &= ~mask[:, 1:]
+    run_ends = np.flatnonzero(edges)
+    del edges
+
+    # Runs of the row above overlapping the columns of each run, widened by one land on each side
+    run_rows, run_cols = np.divmod(run_starts, cols)
+    previous_row = (run_rows - 1) * cols
+    first = np.searchsorted(run_ends, previous_row + np.maximum(run_cols - 1, 0))
+    last = np.searchsorted(run_starts, previous_row + np.minimum(run_ends - run_rows * cols + 1, cols - 1),
+                           side="right")
+    counts = np.maximum(last - first, 0)
+    below = np.repeat(np.arange(run_starts.size), counts)
+    above = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(below.size)
+
+    parent = np.arange(run_starts.size)
+    while above.size:
+        above_root, below_root = parent[above], parent[below]
+        apart = above_root != below_root
+        if not apart.any():
+            break
+        above, below = above[apart], below[apart]
+        above_root, below_root = above_root[apart], below_root[apart]
+        np.minimum.at(parent, np.maximum(above_root, below_root), np.minimum(above_root, below_root))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return run_starts, run_ends, parent
+
+
+def zero_region(solution_map: np.ndarray, row: int, col: int) -> tuple:
+    """
+    Find the region of adjacent lands without adjacent mines the land at (row, col) belongs to.
+
+    The runs of such lands are labelled by `label_runs` in an area around the land, grown towards each side the
+    region reaches until the region lies within it, so time and memory go with the size of the region rather
+    than of the board. Returns a mask of the region in its bounding box, with the top row and left column of
+    the box.
+    """
+    rows, cols = solution_map.shape
+    top, bottom = max(row - REGION_MARGIN, 0), min(row + REGION_MARGIN + 1, rows)
+    left, right = max(col - REGION_MARGIN, 0), min(col + REGION_MARGIN + 1, cols)
+    while True:
+        height, width = bottom - top, right - left
+        run_starts, run_ends, labels = label_runs(solution_map[top:bottom, left:right] == 0)
+        run = np.searchsorted(run_starts, (row - top) * width + col - left, side="right") - 1
+        inside = labels == labels[run]
+        run_starts, run_ends = run_starts[inside], run_ends[inside]
+        first_row, last_row = run_starts[0] // width, run_ends[-1] // width
+        first_col, last_col = int((run_starts % width).min()), int((run_ends % width).max())
+
+        # Lands of the region on a side of the area may have neighbours in the region beyond it
+        grown = (max(top - height, 0) if first_row == 0 else top,
+                 min(bottom + height, rows) if last_row == height - 1 else bottom,
+                 max(left - width, 0) if first_col == 0 else left,
+                 min(right + width, cols) if last_col == width - 1 else right)
+        if grown == (top, bottom, left, right):
+            break
+        top, bottom, left, right = grown
+
+    # Mark where each run starts and where it stops, then sum the marks along rows
+    run_rows = run_starts // width - first_row
+    marks = np.zeros((last_row - first_row + 1, last_col - first_col + 2), dtype=np.int8)
+    marks[run_rows, run_starts % width - first_col] = 1
+    marks[run_rows, run_ends % width - first_col + 1] = -1
+    inside = np.cumsum(marks, axis=1, dtype=np.int8)[:, :-1].astype(bool)
+    return inside, top + first_row, left + first_col
+
+
+def border(inside: np.ndarray, top: int, left: int, shape: tuple) -> tuple:
+    """
+    Spread a mask of lands in a box at (`top`, `left`) of a board of `shape` by one land.
+
+    Returns the spread mask with the rows and columns of the board it spans.
+    """
+    height, width = inside.shape
+    near = np.zeros((height + 2, width + 2), dtype=bool)
+    for dr in range(3):
+        for dc in range(3):
+            near[dr:dr + height, dc:dc + width] |= inside
+
+    rows, cols = shape
+    box_rows = slice(max(top - 1, 0), min(top + height + 1, rows))
+    box_cols = slice(max(left - 1, 0), min(left + width + 1, cols))
+    near = near[box_rows.start - (top - 1):box_rows.stop - (top - 1),
+                box_cols.start - (left - 1):box_cols.stop - (left - 1)]
+    return near, box_rows, box_cols
+
+
+def flood_fill(solution_map: np.ndarray, state_map: np.ndarray, row: int, col: int) -> tuple:
+    """
+    Uncover the land at (row, col), spreading over adjacent lands while the adjacent mine count is 0.
+
+    The region of lands without adjacent mines the land belongs to is found by `zero_region`, and uncovered at
+    once with the lands around it, so the fill has no recursion and no loop over the rings of lands it spreads
+    over. Returns the row and column indices of the newly uncovered lands, and how many of them were flagged.
+    """
+    if state_map[row, col] == UNCOVERED_STATE:
+        return NO_LANDS, 0
+
+    if solution_map[row, col] != 0:
+        num_unflagged = int(state_map[row, col] == FLAGGED_STATE)
+        state_map[row, col] = UNCOVERED_STATE
+        return (np.array([row]), np.array([col])), num_unflagged
+
+    near, box_rows, box_cols = border(*zero_region(solution_map, row, col), solution_map.shape)
+    states = state_map[box_rows, box_cols]
+    near &= states != UNCOVERED_STATE
+    num_unflagged = int(np.count_nonzero(states[near] == FLAGGED_STATE))
+
+    state_map[box_rows, box_cols] = np.where(near, UNCOVERED_STATE, states)
+    opened_rows, opened_cols = np.nonzero(near)
+    opened_rows += box_rows.start
+    opened_cols += box_cols.start
+    return (opened_rows, opened_cols), num_unflagged
+
+
+def place_mines(num_boards: int, rows: int, cols: int, num_mines: int, rng: np.random.Generator,
+                exclude: np.ndarray = None) -> np.ndarray:
+    """
+    Randomize mine locations of `num_boards` boards at once, as mine maps of shape (num_boards, rows, cols).
+
+    Lands set in the `exclude` mask are kept free of mines.
+    """
+    size = rows * cols
+    keys = rng.random((num_boards, size))
+    if exclude is not None:
+        keys[:, exclude.reshape(-1)] = 2.
+        size -= np.count_nonzero(exclude)
+    num_mines = min(num_mines, size)
+
+    # The `num_mines` smallest random keys of each board are its mines
+    mine_indices = np.argpartition(keys, min(num_mines, keys.shape[1] - 1), axis=1)[:, :num_mines]
+
+    mine_maps = np.zeros(keys.shape, dtype=bool)
+    np.put_along_axis(mine_maps, mine_indices, True, axis=1)
+    return mine_maps.reshape(num_boards, rows, cols)
+
+
+def generate_boards(num_boards: int, rows: int, cols: int, num_mines: int,
+                    rng: np.random.Generator = None, exclude: np.ndarray = None) -> tuple:
+    """
+    Generate a batch of MineSweeper boards, with no mines on the lands set in the `exclude` mask.
+
+    Returns stacked mine maps and solution maps (adjacent mine counts), both of shape (num_boards, rows, cols).
+    """
+    rng = rng or np.random.default_rng()
+    mine_maps = place_mines(num_boards, rows, cols, num_mines, rng, exclude)
+    return mine_maps, count_neighbours(mine_maps)
+
+
+def neighbourhood(shape: tuple, row: int, col: int) -> np.ndarray:
+    """Return a mask of the land at (row, col) and its adjacent lands."""
+    mask = np.zeros(shape, dtype=bool)
+    mask[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = True
+    return mask
+
+
+class LandPlane:
+    """
+    Array-like view of one field packed in the land bytes of a board.
+
+    Indexing and assigning work like with a NumPy array of the unpacked field, only touching the indexed lands.
+    """
+
+    def __init__(self, lands: np.ndarray, shift: int, mask: int, dtype: type = np.uint8) -> None:
+        self.lands = lands
+        self.shift = shift
+        self.mask = mask
+        self.dtype = dtype
+        self.scalar = bool if dtype is bool else int
+
+    @property
+    def shape(self) -> tuple:
+        """Shape of the board."""
+        return self.lands.shape
+
+    @property
+    def size(self) -> int:
+        """Number of lands of the board."""
+        return self.lands.size
+
+    def reshape(self, *shape) -> "LandPlane":
+        """View the same field with another board shape."""
+        return LandPlane(self.lands.reshape(*shape), self.shift, self.mask, self.dtype)
+
+    def __getitem__(self, key: tuple) -> np.ndarray:
+        values = self.lands[key]
+        if not isinstance(values, np.ndarray):
+            # Single lands are looked up often by the solver, so skip NumPy scalar arithmetic
+            return self.scalar((int(values) >> self.shift) & self.mask)
+        return ((values >> self.shift) & self.mask).astype(self.dtype, copy=False)
+
+    def __setitem__(self, key: tuple, values: np.ndarray) -> None:
+        values = (np.asarray(values).astype(np.uint8) & self.mask) << self.shift
+        self.lands[key] = (self.lands[key] & ~np.uint8(self.mask << self.shift)) | values
+
+    def __array__(self, dtype: type = None, copy: bool = None) -> np.ndarray:
+        return self[...].astype(dtype or self.dtype)
+
+    def __eq__(self, other: object) -> np.ndarray:
+        return self[...] == other
+
+    def __ne__(self, other: object) -> np.ndarray:
+        return self[...] != other
+
+    def __invert__(self) -> np.ndarray:
+        return ~self[...]
+
+
+class Minefield:
+    """
+    Display-free MineSweeper game board.
+
+    Each land is packed in a single byte holding its state, whether it is mined, and its adjacent mine count;
+    `state_map`, `mine_map` and `solution_map` are array-like views of these fields. Given a `path`, the lands
+    are kept in a memory-mapped file after a `BOARD_HEADER`, so huge boards are not fully resident in memory and
+    can be resumed later with `Minefield.open`.
+
+    With `safe_start`, mines are only placed on the first poke, away from the poked land and its adjacent lands.
+    """
+
+    def __init__(self, rows: int, cols: int, num_mines: int, rng: np.random.Generator = None,
+                 safe_start: bool = False, path: str = None) -> None:
+        self.shape = rows, cols
+        self.num_mines = num_mines
+        self.rng = rng or np.random.default_rng()
+        self.safe_start = safe_start
+
+        # Game board records the state of each cell
+        if path is None:
+            self.lands = np.zeros(self.shape, dtype=np.uint8)
+        else:
+            with open(path, "wb") as file:
+                file.write(self._header())
+                file.truncate(BOARD_HEADER.size + rows * cols)
+            self.lands = np.memmap(path, dtype=np.uint8, mode="r+", offset=BOARD_HEADER.size, shape=self.shape)
+        self.state_map = LandPlane(self.lands, STATE_SHIFT, STATE_MASK)
+        self.mine_map = LandPlane(self.lands, MINE_SHIFT, MINE_MASK, bool)
+        self.solution_map = LandPlane(self.lands, COUNT_SHIFT, COUNT_MASK)
+
+        # Running counters, so evaluating the board does not rescan it
+        self.num_uncovered = 0
+        self.num_flagged = 0
+
+        # Location of the poked mine, if any, also kept as its state so saved boards stay lost
+        self.exploded = None
+
+        # Whether mines are placed yet
+        self.armed = False
+
+    @classmethod
+    def open(cls, path: str, rng: np.random.Generator = None) -> "Minefield":
+        """Resume a game board saved to, or memory-mapped in, a file."""
+        with open(path, "rb") as file:
+            magic, version, rows, cols, num_mines, safe_start = BOARD_HEADER.unpack(file.read(BOARD_HEADER.size))
+        if magic != BOARD_MAGIC:
+            raise ValueError("Not a saved game board.")
+        if version != BOARD_VERSION:
+            raise ValueError(f"Unsupported game board version {version}.")
+
+        field = cls(rows, cols, num_mines, rng)
+        field.safe_start = safe_start
+        lands = np.memmap(path, dtype=np.uint8, mode="r+", offset=BOARD_HEADER.size, shape=field.shape)
+        field.lands = lands
+        field.state_map.lands = field.mine_map.lands = field.solution_map.lands = lands
+
+        num_mines = 0
+        for band in field._bands():
+            states = (lands[band] >> STATE_SHIFT) & STATE_MASK
+            field.num_uncovered += int(np.count_nonzero(states == UNCOVERED_STATE))
+            field.num_flagged += int(np.count_nonzero(states == FLAGGED_STATE))
+            exploded = np.argwhere(states == EXPLODED_STATE)
+            if len(exploded):
+                field.exploded = band.start + int(exploded[0, 0]), int(exploded[0, 1])
+            num_mines += int(np.count_nonzero(lands[band] & (MINE_MASK << MINE_SHIFT)))
+
+        # Boards placing mines on the first poke are saved without mines until then
+        field.armed = num_mines > 0 or not safe_start
+        if field.armed:
+            field.num_mines = num_mines
+        return field
+
+    def _header(self) -> bytes:
+        """Header of the game board saved to a file."""
+        return BOARD_HEADER.pack(BOARD_MAGIC, BOARD_VERSION, *self.shape, self.num_mines, self.safe_start)
+
+    def save(self, path: str) -> None:
+        """Save the game board to a file, which `Minefield.open` resumes."""
+        with open(path, "wb") as file:
+            file.write(self._header())
+            for band in self._bands():
+                self.lands[band].tofile(file)
+
+    def flush(self) -> None:
+        """Write changes of a memory-mapped game board to its file."""
+        if isinstance(self.lands, np.memmap):
+            self.lands.flush()
+
+    def _bands(self) -> list:
+        """Split the board in slices of whole rows of about `BAND_LANDS` lands."""
+        rows, cols = self.shape
+        height = max(1, BAND_LANDS // cols)
+        return [slice(start, min(start + height, rows)) for start in range(0, rows, height)]
+
+    def _fill(self, around: tuple = None) -> None:
+        """Randomize mine locations and count adjacent mines one band at a time, keeping `around` free of mines."""
+        rows, cols = self.shape
+        bands = self._bands()
+
+        # Rows and columns of each band in the box around `around`, if any, and how many lands they hold
+        boxes = [None] * len(bands)
+        excluded = [0] * len(bands)
+        if around is not None:
+            row, col = around
+            box_cols = slice(max(col - 1, 0), min(col + 2, cols))
+            for i, band in enumerate(bands):
+                top, bottom = max(row - 1, band.start), min(row + 2, band.stop)
+                if top < bottom:
+                    boxes[i] = slice(top - band.start, bottom - band.start), box_cols
+                    excluded[i] = (bottom - top) * (box_cols.stop - box_cols.start)
+
+        # Share the mines between bands as if drawn at random from the whole board
+        sizes = [(band.stop - band.start) * cols - num_excluded for band, num_excluded in zip(bands, excluded)]
+        num_mines = min(self.num_mines, sum(sizes))
+        shares = self.rng.multivariate_hypergeometric(sizes, num_mines) if len(bands) > 1 else [num_mines]
+
+        # Lands keep their state, so flags placed before the first poke stay
+        for band, share, box in zip(bands, shares, boxes):
+            exclude = None
+            if box is not None:
+                exclude = np.zeros((band.stop - band.start, cols), dtype=bool)
+                exclude[box] = True
+            mine_map = place_mines(1, band.stop - band.start, cols, share, self.rng, exclude)[0]
+            states = self.lands[band] & np.uint8(STATE_MASK << STATE_SHIFT)
+            self.lands[band] = states | (mine_map.astype(np.uint8) << MINE_SHIFT)
+
+        # Adjacent mines of a band include those of the rows just outside it
+        for band in bands:
+            top, bottom = max(band.start - 1, 0), min(band.stop + 1, rows)
+            mine_map = (self.lands[top:bottom] >> MINE_SHIFT) & MINE_MASK
+            counts = count_neighbours(mine_map)[band.start - top:band.stop - top]
+            self.lands[band] = (self.lands[band] & ~np.uint8(COUNT_MASK << COUNT_SHIFT)) | (counts << COUNT_SHIFT)
+
+        self.num_mines = num_mines
+        self.armed = True
+
+    def reset(self, mine_map: np.ndarray = None) -> None:
+        """Clear the game board for the next game, with randomized mine locations unless `mine_map` is given."""
+        if mine_map is not None:
+            self.load(mine_map)
+            return
+
+        self.clear()
+        self.armed = False
+        if not self.safe_start:
+            self._fill()
+
+    def load(self, mine_map: np.ndarray, solution_map: np.ndarray = None) -> None:
+        """Clear the game board and use the given mine locations, e.g. a board from `generate_boards`."""
+        mine_map = np.asarray(mine_map, dtype=bool)
+        solution_map = count_neighbours(mine_map) if solution_map is None else np.asarray(solution_map)
+        self.lands[:, :] = (mine_map.astype(np.uint8) << MINE_SHIFT) | (solution_map.astype(np.uint8) << COUNT_SHIFT)
+        self.num_mines = int(np.count_nonzero(mine_map))
+        self.armed = True
+
+        self.num_uncovered = 0
+        self.num_flagged = 0
+        self.exploded = None
+
+    def clear(self) -> None:
+        """Cover every land again."""
+        for band in self._bands():
+            self.lands[band] &= ~np.uint8(STATE_MASK << STATE_SHIFT)
+        self.num_uncovered = 0
+        self.num_flagged = 0
+        self.exploded = None
+
+    def arm(self, row: int, col: int) -> None:
+        """Place mines for a game whose first poke is at (row, col), keeping its adjacent lands free of mines."""
+        self._fill((row, col))
+
+    @property
+    def mines_left(self) -> int:
+        """Count of mines not yet flagged."""
+        return self.num_mines - self.num_flagged
+
+    @property
+    def lost(self) -> bool:
+        """Whether a mine was poked."""
+        return self.exploded is not None
+
+    @property
+    def won(self) -> bool:
+        """Whether every land without a mine is uncovered."""
+        # Mines are never uncovered without losing, so once every other land is uncovered,
+        #  all and only all mines are covered
+        rows, cols = self.shape
+        return not self.lost and rows * cols - self.num_uncovered == self.num_mines
+
+    @property
+    def over(self) -> bool:
+        """Whether the game is won or lost."""
+        return self.lost or self.won
+
+    def flag(self, row: int, col: int) -> bool:
+        """Toggle the flag on a covered location, returning whether it changed."""
+        if self.state_map[row, col] == COVERED_STATE:
+            self.state_map[row, col] = FLAGGED_STATE
+            self.num_flagged += 1
+        elif self.state_map[row, col] == FLAGGED_STATE:
+            self.state_map[row, col] = COVERED_STATE
+            self.num_flagged -= 1
+        else:
+            return False
+        return True
+
+    def poke(self, row: int, col: int) -> tuple:
+        """
+        Uncover a covered location.
+
+        Returns the row and column indices of the newly uncovered lands; these are empty if the location
+        is not covered, or if it holds a mine, in which case the game is lost.
+        """
+        if self.state_map[row, col] != COVERED_STATE or self.over:
+            return NO_LANDS
+
+        if not self.armed:
+            self.arm(row, col)
+
+        if self.mine_map[row, col]:
+            self.state_map[row, col] = EXPLODED_STATE
+            self.exploded = row, col
+            return NO_LANDS
+
+        opened, num_unflagged = flood_fill(self.solution_map, self.state_map, row, col)
+        self.num_uncovered += len(opened[0])
+        self.num_flagged -= num_unflagged
+        return opened
@@ -0,0 +1,413 @@
+import numpy as np
+
+from mine_engine import (
+    COVERED_STATE, FLAGGED_STATE, NEIGHBOUR_COLS, NEIGHBOUR_ROWS,
+    UNCOVERED_STATE, Minefield, count_neighbours, generate_boards,
+    neighbourhood
+)
+
+# How many random lands to try when looking for a land away from the frontier
+INTERIOR_SAMPLES = 32
+
+# Offsets to the lands whose constraints can overlap with a land's constraint
+PAIR_OFFSETS = [(dr, dc) for dr in range(-2, 3) for dc in range(-2, 3) if dr or dc]
+
+# Lands worth of candidate boards tried at once by `generate_no_guess`, and how many times it may solve a board again
+CANDIDATE_LANDS = 4096
+MAX_REPAIRS = 100
+
+# How much of a solve stays valid after a repair: what the solver knows but not how it knows, or all of it
+REPAIR_DIRTY, REPAIR_CLEAN = range(2)
+
+
+class Solver:
+    """
+    Constraint-propagation MineSweeper solver.
+
+    Every uncovered land with covered neighbours is a constraint: its covered, not known to be mined, neighbours
+    hold exactly its remaining adjacent mine count. Constraints are only re-examined when one of their
+    neighbours changed since the last move, so each move costs time in the size of the change, not the board.
+    """
+
+    def __init__(self, field: Minefield, rng: np.random.Generator = None) -> None:
+        self.field = field
+
+        # Guesses draw from their own generator, by default, so asking for a hint leaves the random stream of the
+        # board, and with it the replay of a recorded session, untouched
+        self.rng = np.random.default_rng() if rng is None else rng
+
+        # Lands deduced to be mined or safe, safe lands waiting to be uncovered
+        self.mines = set()
+        self.safe = set()
+
+        # Constraints by land: (covered neighbours not known to be mined, mines left among them)
+        self.constraints = {}
+
+        # Uncovered lands whose adjacent mine count some deduction relied on
+        self.used = set()
+
+        # Adjacent locations of the lands examined so far
+        self._neighbours = {}
+
+        # Uncovered lands whose constraint must be re-examined
+        self._pending = set()
+        self.notice(np.nonzero(field.state_map == UNCOVERED_STATE))
+
+    def neighbours(self, row: int, col: int) -> list:
+        """List the locations adjacent to (row, col)."""
+        neighbours = self._neighbours.get((row, col))
+        if neighbours is None:
+            rows, cols = self.field.shape
+            neighbours = self._neighbours[row, col] = [
+                (r, c)
+                for r in range(max(row - 1, 0), min(row + 2, rows))
+                for c in range(max(col - 1, 0), min(col + 2, cols))
+                if r != row or c != col
+            ]
+        return neighbours
+
+    def notice(self, opened: tuple) -> None:
+        """Record lands uncovered since the last move, as returned by `Minefield.poke`."""
+        opened_rows, opened_cols = opened
+        if not len(opened_rows):
+            return
+
+        if len(opened_rows) == 1:
+            land = int(opened_rows[0]), int(opened_cols[0])
+            self.safe.discard(land)
+            self._pending.add(land)
+            self.recheck(*land)
+            return
+
+        # Lands inside an opened region have no covered neighbours: only numbered lands and
+        #  previously uncovered lands next to the opened ones can be constraints
+        rows, cols = self.field.shape
+        near_rows = np.concatenate([opened_rows, (opened_rows + NEIGHBOUR_ROWS).ravel()])
+        near_cols = np.concatenate([opened_cols, (opened_cols + NEIGHBOUR_COLS).ravel()])
+        inside = (near_rows >= 0) & (near_rows < rows) & (near_cols >= 0) & (near_cols < cols)
+        near_rows, near_cols = near_rows[inside], near_cols[inside]
+
+        numbered = ((self.field.state_map[near_rows, near_cols] == UNCOVERED_STATE)
+                    & (self.field.solution_map[near_rows, near_cols] > 0))
+        self._pending.update(zip(near_rows[numbered].tolist(), near_cols[numbered].tolist()))
+        self.safe.difference_update(zip(opened_rows.tolist(), opened_cols.tolist()))
+
+    def mark_mine(self, row: int, col: int) -> None:
+        """Record a deduced mine, so its uncovered neighbours are re-examined."""
+        if (row, col) in self.mines:
+            return
+        self.mines.add((row, col))
+        self.recheck(row, col)
+
+    def recheck(self, row: int, col: int) -> None:
+        """Re-examine the uncovered neighbours of a land whose content changed."""
+        state_map = self.field.state_map
+        self._pending.update(land for land in self.neighbours(row, col) if state_map[land] == UNCOVERED_STATE)
+
+    def _examine(self, land: tuple) -> bool:
+        """Rebuild the constraint of an uncovered land, applying single-land rules. Return whether it remains."""
+        state_map = self.field.state_map
+        self.constraints.pop(land, None)
+        if state_map[land] != UNCOVERED_STATE:
+            return False
+
+        unknown = []
+        mines_left = int(self.field.solution_map[land])
+        for near in self.neighbours(*land):
+            if near in self.mines:
+                mines_left -= 1
+            elif state_map[near] != UNCOVERED_STATE:
+                unknown.append(near)
+
+        if not unknown:
+            return False
+        if mines_left == 0:
+            self.safe.update(unknown)
+            self.used.add(land)
+            return False
+        if mines_left == len(unknown):
+            for near in unknown:
+                self.mark_mine(*near)
+            self.used.add(land)
+            return False
+
+        self.constraints[land] = frozenset(unknown), mines_left
+        return True
+
+    def _compare(self, land: tuple, other: tuple) -> None:
+        """Apply the pairwise rule to two overlapping constraints."""
+        unknown, mines_left = self.constraints[land]
+        other_unknown, other_mines_left = self.constraints[other]
+        if unknown.isdisjoint(other_unknown):
+            return
+
+        only_land = unknown - other_unknown
+        only_other = other_unknown - unknown
+        if not only_other:
+            return
+
+        # If all the mines `other` has more than `land` must be in the lands only `other` sees,
+        #  those lands are all mined and the lands only `land` sees are all safe
+        if other_mines_left - mines_left == len(only_other):
+            for near in only_other:
+                self.mark_mine(*near)
+            self.safe.update(only_land)
+            self.used.update((land, other))
+
+        # If the lands both see must hold all the mines `other` has, the lands only `other` sees are all safe
+        elif other_mines_left - mines_left + len(only_land) == 0:
+            self.safe.update(only_other)
+            self.used.update((land, other))
+
+    def deduce(self) -> bool:
+        """Propagate constraints changed since the last call, returning whether new mines or safe lands were found."""
+        found = len(self.mines), len(self.safe)
+
+        while self._pending:
+            pending, self._pending = self._pending, set()
+            changed = [land for land in pending if self._examine(land)]
+
+            # Constraints can only overlap with constraints at most 2 lands away
+            constraints = self.constraints
+            for row, col in changed:
+                for dr, dc in PAIR_OFFSETS:
+                    other = row + dr, col + dc
+                    if other in constraints and (row, col) in constraints:
+                        self._compare((row, col), other)
+                        self._compare(other, (row, col))
+
+        self.safe.difference_update(self.mines)
+        return (len(self.mines), len(self.safe)) != found
+
+    def guess(self) -> tuple:
+        """
+        Pick the covered land least likely to be mined.
+
+        Frontier lands are estimated by the densest constraint they belong to, and all other covered lands
+        by the density of mines not accounted for, so the estimate costs time in the frontier size only.
+        """
+        field = self.field
+        rows, cols = field.shape
+
+        best, best_odds = None, 1.
+        frontier = {}
+        for unknown, mines_left in self.constraints.values():
+            odds = mines_left / len(unknown)
+            for land in unknown:
+                frontier[land] = max(frontier.get(land, 0.), odds)
+        for land, odds in frontier.items():
+            if odds < best_odds:
+                best, best_odds = land, odds
+
+        interior = rows * cols - field.num_uncovered - len(self.mines) - len(frontier)
+        if interior > 0:
+            odds = (field.num_mines - len(self.mines) - sum(frontier.values())) / interior
+            if best is None or odds < best_odds:
+                land = self._interior(frontier)
+                if land is not None:
+                    return land
+        return best
+
+    def _interior(self, frontier: dict) -> tuple:
+        """Find a covered land away from the frontier, sampling at random before scanning the board."""
+        field = self.field
+        rows, cols = field.shape
+        state_map = field.state_map
+
+        for row, col in self.rng.integers((rows, cols), size=(INTERIOR_SAMPLES, 2)).tolist():
+            if state_map[row, col] != UNCOVERED_STATE and (row, col) not in self.mines and (row, col) not in frontier:
+                return row, col
+
+        for row, col in np.argwhere(state_map != UNCOVERED_STATE).tolist():
+            if (row, col) not in self.mines and (row, col) not in frontier:
+                return row, col
+        return None
+
+    def hint(self) -> tuple:
+        """
+        Suggest the next move as (row, col, is_mine), without playing it.
+
+        Deduced safe lands come first, then deduced mines not yet flagged, then the best guess.
+        """
+        self.deduce()
+        if self.safe:
+            return (*next(iter(self.safe)), False)
+
+        state_map = self.field.state_map
+        for land in self.mines:
+            if state_map[land] != FLAGGED_STATE:
+                return (*land, True)
+
+        land = self.guess()
+        return None if land is None else (*land, False)
+
+    def poke(self, row: int, col: int) -> None:
+        """Uncover a land on the board and take the result into account."""
+        self.safe.discard((row, col))
+        self.notice(self.field.poke(row, col))
+
+    def step(self) -> bool:
+        """Uncover every land known to be safe, returning False if none could be deduced."""
+        self.deduce()
+        if not self.safe:
+            return False
+        while self.safe and not self.field.over:
+            self.poke(*self.safe.pop())
+        return True
+
+
+def solve(field: Minefield, guess: bool = True) -> bool:
+    """
+    Play a board to completion, returning whether it was won.
+
+    Without `guess`, stop as soon as no land can be deduced safe instead of guessing. Guesses draw from the
+    board's random generator, so a seeded board is always played the same way.
+    """
+    solver = Solver(field, field.rng)
+    while not field.over:
+        if not solver.step():
+            if not guess:
+                break
+            land = solver.guess()
+            if land is None:
+                break
+            solver.poke(*land)
+    return field.won
+
+
+def _repair(solver: Solver, exclude: np.ndarray) -> int:
+    """
+    Move one mine the solver is stuck on to a land outside the region it is stuck in.
+
+    Only the adjacent mine counts around the two lands change. Moves keeping every earlier deduction valid
+    come first: from next to no count a deduction relied on, to a covered land next to no uncovered land.
+    Otherwise the mine goes to another covered land, or as a last resort under an uncovered land that is
+    covered again, which keeps what the solver knows true but may void earlier deductions.
+    Return whether the repair is `REPAIR_CLEAN` or `REPAIR_DIRTY`, or None if no mine can be moved.
+    """
+    field = solver.field
+    state_map = field.state_map
+    region = {land for unknown, _ in solver.constraints.values() for land in unknown}
+    stuck = {land for land in region if field.mine_map[land]}
+    if not stuck:
+        # The lands left are walled in by known mines
+        for mine in solver.mines:
+            walled = [land for land in solver.neighbours(*mine)
+                      if state_map[land] != UNCOVERED_STATE and land not in solver.mines]
+            if walled:
+                stuck.add(mine)
+                region.update(walled)
+    if not stuck:
+        return None
+
+    free = ~field.mine_map & ~exclude
+    if region:
+        free[tuple(np.array(list(region)).T)] = False
+    uncovered = state_map == UNCOVERED_STATE
+    covered = free & ~uncovered
+    hidden = covered & (count_neighbours(uncovered) == 0)
+
+    # Uncovered lands not opened by spreading from an empty land, and whose neighbours did not spread either
+    empty = uncovered & (field.solution_map == 0)
+    unspread = free & uncovered & ~empty & (count_neighbours(empty) == 0)
+
+    for targets, outcome in ((hidden, REPAIR_CLEAN), (covered, REPAIR_DIRTY), (unspread, REPAIR_DIRTY)):
+        targets = np.argwhere(targets)
+        if len(targets):
+            break
+    else:
+        return None
+
+    clean = [land for land in stuck if solver.used.isdisjoint(solver.neighbours(*land))]
+    sources = clean or sorted(stuck)
+    source = sources[field.rng.integers(len(sources))]
+    target = tuple(targets[field.rng.integers(len(targets))])
+    for (row, col), change in ((source, -1), (target, 1)):
+        field.mine_map[row, col] = change > 0
+        around = neighbourhood(field.shape, row, col)
+        around[row, col] = False
+        field.solution_map[around] += np.uint8(change % 256)
+
+    if uncovered[target]:
+        state_map[target] = COVERED_STATE
+        field.num_uncovered -= 1
+        solver.constraints.pop(target, None)
+        solver.used.discard(target)
+
+    solver.mines.discard(source)
+    solver.recheck(*source)
+    solver.recheck(*target)
+    return outcome if clean else min(outcome, REPAIR_DIRTY)
+
+
+def _play_safe(solver: Solver, row: int, col: int) -> None:
+    """Uncover the first land then every land that can be deduced safe, stopping when stuck."""
+    solver.poke(row, col)
+    while not solver.field.over and solver.step():
+        pass
+
+
+def generate_no_guess(rows: int, cols: int, num_mines: int, row: int, col: int,
+                      rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Generate a mine map that can be solved without guessing, starting with a poke at (row, col).
+
+    Candidate boards are generated in batches, and the one the solver uncovers furthest is repaired by
+    moving mines out of the regions where the solver gets stuck. Repairs can change what an earlier deduction
+    relied on, so the repaired board is solved again from the start until it needs no repair.
+    """
+    rng = rng or np.random.default_rng()
+    exclude = neighbourhood((rows, cols), row, col)
+
+    while True:
+        # Keep the candidate the solver gets furthest in, with the solver stuck on it
+        mine_maps, solution_maps = generate_boards(max(1, CANDIDATE_LANDS // (rows * cols)), rows, cols,
+                                                   num_mines, rng, exclude)
+        best = None
+        for mine_map, solution_map in zip(mine_maps, solution_maps):
+            field = Minefield(rows, cols, num_mines, rng)
+            field.load(mine_map, solution_map)
+            solver = Solver(field)
+            _play_safe(solver, row, col)
+            if field.won:
+                return mine_map
+            if best is None or field.num_uncovered > best.field.num_uncovered:
+                best = solver
+
+        solver = best
+        for _ in range(MAX_REPAIRS):
+            outcome = REPAIR_CLEAN
+            while not solver.field.won:
+                repaired = _repair(solver, exclude)
+                if repaired is None:
+                    break
+                outcome = min(outcome, repaired)
+                while not solver.field.over and solver.step():
+                    pass
+            if outcome == REPAIR_CLEAN:
+                if solver.field.won:
+                    return np.asarray(solver.field.mine_map)
+                break
+
+            # Some repair changed a count an earlier deduction relied on: solve the board again from the start
+            field = Minefield(rows, cols, num_mines, rng)
+            field.load(solver.field.mine_map, solver.field.solution_map)
+            solver = Solver(field)
+            _play_safe(solver, row, col)
+            if field.won:
+                return np.asarray(field.mine_map)
+
+
+class NoGuessMinefield(Minefield):
+    """MineSweeper game board whose mines are placed on the first poke, so that it can be solved without guessing."""
+
+    def __init__(self, rows: int, cols: int, num_mines: int, rng: np.random.Generator = None) -> None:
+        super().__init__(rows, cols, num_mines, rng, safe_start=True)
+
+    def arm(self, row: int, col: int) -> None:
+        """Place mines for a game whose first poke is at (row, col), so that the game needs no guess."""
+        mine_map = generate_no_guess(*self.shape, self.num_mines, row, col, self.rng)
+        self.mine_map[:, :] = mine_map
+        self.solution_map[:, :] = count_neighbours(mine_map)
+        self.num_mines = int(np.count_nonzero(mine_map))
+        self.armed = True
@@ -0,0 +1,142 @@
+"""
+Per-frame timing of game loops.
+
+A `FrameTimer` splits each frame into phases, such as reading input, stepping the game, drawing and sending the
+output to the terminal, and keeps the latest frame times to report their median, 99th percentile and the frames
+that went over budget. It can be shown as an on-screen overlay, toggled with `OVERLAY_KEY`, and exported as JSON.
+Until it is enabled, each of its calls only checks a flag.
+
+Set the `PERF_EXPORT` environment variable to a file path to time every frame from the start and export the
+timings there when a game ends.
+"""
+import curses
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Key toggling the overlay, and with it the timing of frames
+OVERLAY_KEY = curses.KEY_F3
+
+# File the timings are exported to when games end, which also enables the timer from the start
+EXPORT_PATH = os.environ.get("PERF_EXPORT")
+
+# Frames kept for the rolling statistics
+HISTORY = 600
+
+# Upper edges of the frame time histogram buckets, in seconds; the last bucket holds every longer frame
+BUCKETS = (.001, .002, .004, .008, .016, .032, .064, .128)
+
+# Shortest time between updates of the overlay text, so drawing it barely costs anything
+OVERLAY_INTERVAL = .25
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Value below which `fraction` of the sorted `values` lie, by nearest rank."""
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.
+
+
+class FrameTimer:
+    """
+    Times the phases of each frame of a game loop.
+
+    Call `begin` when a frame starts, `mark` with the name of the phase that just ended, as often as phases
+    alternate, and `end` when the frame is done; time between `mark` calls adds up per phase within a frame.
+    """
+
+    def __init__(self, budget: float, name: str = "game", enabled: bool = None, history: int = HISTORY,
+                 clock: callable = time.perf_counter) -> None:
+        self.budget = budget
+        self.name = name
+        self.enabled = EXPORT_PATH is not None if enabled is None else enabled
+        self.overlay = False
+        self.clock = clock
+
+        self.frames = deque(maxlen=history)
+        self.phases = {}
+        self.current = {}
+        self.late = self.dropped = self.count = 0
+        self.start = self.last = 0.
+        self.shown = -OVERLAY_INTERVAL
+        self.text = []
+
+    def begin(self) -> None:
+        """Start timing a frame."""
+        if self.enabled:
+            self.start = self.last = self.clock()
+
+    def mark(self, phase: str) -> None:
+        """Add the time since the previous mark, or the start of the frame, to a phase."""
+        if self.enabled:
+            now = self.clock()
+            self.current[phase] = self.current.get(phase, 0.) + now - self.last
+            self.last = now
+
+    def end(self, dropped: int = 0) -> None:
+        """Finish timing a frame, given the simulation steps the game loop dropped in it."""
+        if not self.enabled:
+            return
+        elapsed = self.clock() - self.start
+        self.frames.append(elapsed)
+        for phase, seconds in self.current.items():
+            if phase not in self.phases:
+                self.phases[phase] = deque(maxlen=self.frames.maxlen)
+            self.phases[phase].append(seconds)
+        self.current = {}
+        self.count += 1
+        self.late += elapsed > self.budget
+        self.dropped += dropped
+
+    def toggle(self) -> None:
+        """Show or hide the overlay, timing frames while it is shown."""
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or EXPORT_PATH is not None
+        self.shown = -OVERLAY_INTERVAL
+
+    def summary(self) -> dict:
+        """Statistics of the frames kept, with their phases, in seconds."""
+        frames = sorted(self.frames)
+        histogram = [0] * (len(BUCKETS) + 1)
+        for seconds in frames:
+            histogram[bisect_left(BUCKETS, seconds)] += 1
+        phases = {}
+        for phase, values in self.phases.items():
+            values = sorted(values)
+            phases[phase] = {"p50": percentile(values, .5), "p99": percentile(values, .99),
+                             "mean": sum(values) / len(values)}
+        return {
+            "name": self.name, "budget": self.budget, "frames": self.count, "late": self.late,
+            "dropped": self.dropped, "p50": percentile(frames, .5), "p99": percentile(frames, .99),
+            "histogram": {"edges": BUCKETS, "counts": histogram}, "phases": phases,
+        }
+
+    def lines(self) -> list:
+        """Text of the overlay, updated at most every `OVERLAY_INTERVAL` seconds."""
+        now = self.clock()
+        if now - self.shown >= OVERLAY_INTERVAL:
+            self.shown = now
+            summary = self.summary()
+            self.text = [
+                "frame p50 {:.2f} p99 {:.2f} ms, late {}/{}, dropped {}".format(
+                    summary["p50"] * 1e3, summary["p99"] * 1e3, summary["late"], summary["frames"],
+                    summary["dropped"]),
+                " ".join("{} {:.2f}/{:.2f}".format(phase, stats["p50"] * 1e3, stats["p99"] * 1e3)
+                         for phase, stats in summary["phases"].items()),
+            ]
+        return self.text
+
+    def draw(self, window: object, y: int, x: int) -> None:
+        """Draw the overlay on a curses window from (y, x), cut to the window width, if it is shown."""
+        if not self.overlay:
+            return
+        width = window.getmaxyx()[1] - x - 1
+        for i, line in enumerate(self.lines()):
+            window.addnstr(y + i, x, line.ljust(width), width, curses.A_REVERSE)
+
+    def export(self, path: str = None) -> None:
+        """Append the statistics as a line of JSON to a file, by default the `PERF_EXPORT` one, if any."""
+        path = path or EXPORT_PATH
+        if path and self.count:
+            with open(path, "a") as file:
+                file.write(json.dumps(self.summary()) + "\n")
@@ -1,42 +1,131 @@
-def playPong():
-    import curses
-    import random
-    import time
-
+import curses
+import time
+
+from gameloop import GameLoop, present
+from perf import OVERLAY_KEY, FrameTimer
+from pong_engine import (
+    DOWN_INPUT, MIN_ROWS, NEW_MATCH_INPUT, PADDLE_LENGTH, UP_INPUT, PongGame
+)
+from replay import Session
+
+
+class PongRenderer:
+    """
+    Draws a PongGame on a curses window.
+
+    The border and net are drawn once and the scores only when they change; a moving paddle only redraws the
+    cells it left and entered, and every change of a frame goes to the terminal in a single batched update.
+    """
+
+    def __init__(self, win: object, game: PongGame) -> None:
+        self.win = win
+        self.game = game
+        self.net = game.columns // 2 + 1
+        self.paddles = {}
+        self.ball = None
+        self.scores = None
+
+    def background(self, y: int, x: int) -> None:
+        """Draw what is under the ball at a cell: a paddle, the net or nothing."""
+        for paddle_x, paddle_y in self.paddles.items():
+            if x == paddle_x and paddle_y <= y < paddle_y + PADDLE_LENGTH:
+                self.win.addch(y, x, ' ', curses.color_pair(1))
+                return
+        self.win.addch(y, x, '|' if x == self.net and y % 2 else ' ')
+        # The ball may have run over the scores, which then need drawing again
+        if y == 1:
+            self.scores = None
+
+    def draw_all(self) -> None:
+        """Draw the border, net, paddles, scores and ball, e.g. for the first frame of a match."""
+        self.win.erase()
+        self.win.border()
+        for y in range(1, self.game.rows - 1, 2):
+            self.win.addch(y, self.net, '|')
+        self.paddles = {}
+        self.ball = self.scores = None
+        self.draw()
+
+    def draw_paddle(self, x: int, y: int) -> None:
+        """Move the paddle in column `x` to row `y`, drawing only the cells it left and entered."""
+        old_y = self.paddles.get(x)
+        self.paddles[x] = y
+        if old_y == y:
+            return
+        if old_y is None or abs(y - old_y) >= PADDLE_LENGTH:
+            left = range(old_y, old_y + PADDLE_LENGTH) if old_y is not None else ()
+            entered = range(y, y + PADDLE_LENGTH)
+        elif y > old_y:
+            left, entered = range(old_y, y), range(old_y + PADDLE_LENGTH, y + PADDLE_LENGTH)
+        else:
+            left, entered = range(y + PADDLE_LENGTH, old_y + PADDLE_LENGTH), range(y, old_y)
+        for row in left:
+            self.win.addch(row, x, ' ')
+        for row in entered:
+            self.win.addch(row, x, ' ', curses.color_pair(1))
+
+    def draw_scores(self) -> None:
+        """Draw the scores if they changed since they were last drawn."""
+        scores = self.game.player, self.game.computer
+        if scores != self.scores:
+            self.scores = scores
+            player, computer = 'Player: %s' % scores[0], 'Computer: %s' % scores[1]
+            self.win.addstr(1, 10, player, curses.color_pair(3))
+            self.win.addstr(1, self.game.columns - len(computer) - 11, computer, curses.color_pair(3))
+
+    def draw(self) -> None:
+        """Draw the changes since the last frame."""
+        self.draw_paddle(self.game.player_x, self.game.player_y)
+        self.draw_paddle(self.game.computer_x, self.game.computer_y)
+        ball = self.game.ball_cell
+        if self.ball is not None and self.ball != ball:
+            self.background(*self.ball)
+        self.draw_scores()
+        self.win.addch(*ball, 'x', curses.color_pair(2))
+        self.ball = ball
+
+    def present(self) -> None:
+        """Send the changes of the frame to the terminal at once."""
+        present(self.win)
+
+
+def playPong(replay_path: str = None) -> None:
+    """Play Pong on the whole terminal, saving the session to `replay_path` if given."""
     ESCAPE = 27
-    PADDLE_LENGTH = 6
-    ROWS = 23
-    COLUMNS = 79
-
-    def get_new_ball_coord():
-        y = random.randint(4, ROWS - 4)
-        x = COLUMNS // 2 + 1
-        return y, x
-
-    def draw_paddle(window, y, x, number=0):
-        for i in range(PADDLE_LENGTH):
-            window.addch(y + i, x, ' ', curses.color_pair(number))
-
-    def has_collided(ball_y, ball_x, paddle_y, paddle_x):
-        for i in range(PADDLE_LENGTH):
-            if ball_y == paddle_y + i and ball_x == paddle_x + 1:
-                return True
-
-    def display_winner(window, player):
-        window.addstr(ROWS // 2 - 2, (COLUMNS // 2 + 1) - len('%s wins!' % player) // 2,
+    TICK_RATE = 20
+
+    # Computer opponents picked on the welcome screen, as (reaction steps, aim error in cells) of a
+    # predictive opponent, or None for the classic one following the ball
+    OPPONENTS = {ord('1'): None, ord('2'): (6, 2.), ord('3'): (2, .5)}
+    OPPONENTS_TEXT = '1: classic  2: predictive  3: hard'
+
+    # Smallest terminal: the smallest arena of the engine, wide enough for both scores on the top row
+    MIN_HEIGHT, MIN_WIDTH = MIN_ROWS, 44
+
+    def display_winner(window: object, player: str) -> int:
+        """Show who won the match, then wait for a key and return it."""
+        rows, columns = window.getmaxyx()
+        window.addstr(rows // 2 - 2, (columns // 2 + 1) - len('%s wins!' % player) // 2,
                       '%s wins!' % player, curses.color_pair(3) | curses.A_BOLD)
-        window.addstr(ROWS // 2 - 1, (COLUMNS // 2 + 1) - len('Game Over') // 2,
+        window.addstr(rows // 2 - 1, (columns // 2 + 1) - len('Game Over') // 2,
                       'Game Over', curses.color_pair(3) | curses.A_BOLD)
         window.refresh()
         time.sleep(1)
         window.nodelay(0)
         return window.getch()
 
-    def randomize_speed():
-        return [random.choice((-1, 1)), random.choice((-1, 1))]
-
-    def main(stdscr):
-        # Create a new Curses window
+    def main(stdscr: object) -> None:
+        """Play matches until the player quits."""
+        # Create a new Curses window filling the terminal, which sets the size of the arena
+        ROWS, COLUMNS = stdscr.getmaxyx()
+        if ROWS < MIN_HEIGHT or COLUMNS < MIN_WIDTH:
+            message = "Please enlarge the terminal to {}x{} to play Pong (now {}x{}), then press a key.".format(
+                MIN_WIDTH, MIN_HEIGHT, COLUMNS, ROWS)
+            # The message is cut to what fits, away from the last cell
+            stdscr.addnstr(0, 0, message, COLUMNS - 1)
+            stdscr.refresh()
+            stdscr.getch()
+            return
         win = curses.newwin(ROWS, COLUMNS)
         curses.noecho()
         curses.cbreak()
@@ -49,106 +138,86 @@ def playPong():
         curses.init_pair(2, curses.COLOR_WHITE, curses.COLOR_WHITE)
         curses.init_pair(3, curses.COLOR_RED, curses.COLOR_CYAN)
 
-        # Game variables
-        speed = randomize_speed()
-        player = computer = 0
-        player_y = ROWS // 3
-        player_x = 2
-        computer_y = ROWS // 3
-        computer_x = COLUMNS - 3
-        ball_y, ball_x = get_new_ball_coord()
-
-        # Display welcome screen and wait for key press
+        # Display welcome screen and wait for key press, which picks the opponent
         win.clear()
         win.border()
         win.addstr(ROWS // 2 - 2, (COLUMNS // 2 + 1) - len('XPONG') // 2,
                    'XPONG', curses.color_pair(3) | curses.A_BOLD)
+        win.addstr(ROWS // 2, (COLUMNS // 2 + 1) - len(OPPONENTS_TEXT) // 2,
+                   OPPONENTS_TEXT, curses.color_pair(3))
         win.refresh()
         q = win.getch()
-        win.clear()
-        win.border()
+        opponent = OPPONENTS.get(q)
+
+        # Display-free match holding paddles, ball and scores, recorded for replay
+        params = (ROWS, COLUMNS) if opponent is None else (ROWS, COLUMNS, opponent[0], round(opponent[1] * 100))
+        session = Session('pong', params=params)
+        game = session.create()
+        ticks = 0
+
+        renderer = PongRenderer(win, game)
+        renderer.draw_all()
         win.nodelay(1)
 
-        # Game loop
-        while True:
-            # Delete old ball and paddles
-            draw_paddle(win, player_y, player_x)
-            draw_paddle(win, computer_y, computer_x)
-            win.addch(ball_y, ball_x, ' ')
-
-            # Get user input and check if the user has pressed 'q' to quit
-            # otherwise move the player
-            key = win.getch()
-            if key == ESCAPE or key == ord('q'):
+        # Game loop, stepping the game at a fixed rate however long drawing takes
+        loop = GameLoop(win, TICK_RATE)
+
+        # Time input, steps, drawing and output of each frame, shown over the bottom of the arena with OVERLAY_KEY
+        timer = FrameTimer(1 / TICK_RATE, 'pong')
+
+        for keys, steps in loop.frames():
+            timer.begin()
+            # Check if the user has pressed 'q' to quit, otherwise move the player for each key pressed
+            if ESCAPE in keys or ord('q') in keys:
                 break
-            elif key == curses.KEY_DOWN \
-                    and player_y < ROWS - (PADDLE_LENGTH + 1):
-                player_y += 1
-            elif key == curses.KEY_UP and player_y > 1:
-                player_y -= 1
-
-            # Move the computer
-            if computer_y - random.randint(0, 3) < ball_y \
-                    and computer_y < ROWS - (PADDLE_LENGTH + 1):
-                computer_y += 1
-            if computer_y + PADDLE_LENGTH > ball_y \
-                    and computer_y > 1:
-                computer_y -= 1
-
-            # Move the ball
-            ball_y += speed[0]
-            ball_x += speed[1]
-
-            # Check ball collision
-            if has_collided(ball_y, ball_x, player_y, player_x):
-                speed[1] = -speed[1]
-            if has_collided(ball_y, ball_x, computer_y, computer_x - 1):
-                speed[1] = -speed[1]
-
-            # Checks if the ball is going off win
-            if ball_y <= 1 or ball_y >= ROWS - 2:
-                speed[0] = -speed[0]
-            if ball_x <= 1:
-                speed[0] = random.choice((-1, 1))
-                ball_y, ball_x = get_new_ball_coord()
-                computer += 1
-            elif ball_x >= COLUMNS - 2:
-                speed[0] = random.choice((-1, 1))
-                ball_y, ball_x = get_new_ball_coord()
-                player += 1
-
-            # Draw the net, paddles and ball
-            for i in range(1, ROWS, 2):
-                win.addch(i, 40, '|')
-            draw_paddle(win, player_y, player_x, 1)
-            draw_paddle(win, computer_y, computer_x, 1)
-            win.addstr(1, 10, 'Player: %s' % player, curses.color_pair(3))
-            win.addstr(1, COLUMNS
-                       - len('Computer: %s' % computer) - 11, 'Computer: %s' % computer,
-                       curses.color_pair(3))
+            for key in keys:
+                if key in (curses.KEY_DOWN, curses.KEY_UP):
+                    player_input = DOWN_INPUT if key == curses.KEY_DOWN else UP_INPUT
+                    session.record(ticks, player_input)
+                    game.apply(player_input)
+                elif key == OVERLAY_KEY:
+                    timer.toggle()
+                    # The arena under a hidden overlay needs drawing again
+                    if not timer.overlay:
+                        renderer.draw_all()
+            timer.mark('input')
+
+            # Move the computer and the ball
+            for _ in range(steps):
+                game.step()
+                ticks += 1
+            timer.mark('update')
 
             # Check if there is a winner and display it on screen
-            if player == 11 or computer == 11:
-                if player > computer:
+            if game.over:
+                renderer.draw()
+                if game.player > game.computer:
                     key = display_winner(win, 'Player')
                 else:
                     key = display_winner(win, 'Computer')
                 if key == ESCAPE or key == ord('q'):
                     break
                 # Reset game variables
-                speed = randomize_speed()
-                player = computer = 0
-                player_y = ROWS // 3
-                player_x = 2
-                computer_y = ROWS // 3
-                computer_x = COLUMNS - 3
-                ball_y, ball_x = get_new_ball_coord()
-                win.clear()
-                win.border()
+                session.record(ticks, NEW_MATCH_INPUT)
+                game.apply(NEW_MATCH_INPUT)
+                renderer.draw_all()
                 win.nodelay(1)
-            win.addch(ball_y, ball_x, 'x', curses.color_pair(2))
-            win.refresh()
-            time.sleep(0.05)
+                # No steps are due, nor is the frame timed, for the time spent on the winner screen
+                loop.restart()
+                timer.begin()
+
+            # Draw what moved since the last frame
+            renderer.draw()
+            timer.draw(win, ROWS - 3, 1)
+            timer.mark('draw')
+            renderer.present()
+            timer.mark('output')
+            timer.end(loop.dropped)
+
+        session.finish(ticks, game)
+        if replay_path:
+            session.save(replay_path)
+        timer.export()
 
         # Clean up before exiting
         curses.nocbreak()
@@ -0,0 +1,386 @@
+import random
+
+import numpy as np
+
+ROWS = 23
+COLUMNS = 79
+PADDLE_LENGTH = 6
+WINNING_SCORE = 11
+
+# Smallest arena, walls included: balls are served at least 4 rows away from both walls, and a paddle needs
+# room to move between them
+MIN_ROWS = 8
+MIN_COLUMNS = 8
+
+# Cells the ball moves vertically and horizontally each step
+BALL_SPEED = (1., 1.)
+
+# Most bounces swept in one step, enough for a ball crossing the arena several times a step
+MAX_BOUNCES = 8
+
+# Player inputs: move the paddle one cell up or down, or start the next match once one is won
+UP_INPUT, DOWN_INPUT, NEW_MATCH_INPUT = range(1, 4)
+
+
+def check_size(rows: int, columns: int) -> None:
+    """Raise `ValueError` if an arena is smaller than `MIN_ROWS` by `MIN_COLUMNS`."""
+    if rows < MIN_ROWS or columns < MIN_COLUMNS:
+        raise ValueError(f"A Pong arena needs at least {MIN_ROWS} rows and {MIN_COLUMNS} columns, "
+                         f"not {rows} by {columns}.")
+
+
+def alongside(ball_y: float, paddle_y: int) -> bool:
+    """Whether the ball is in a cell alongside a paddle."""
+    return paddle_y - .5 <= ball_y < paddle_y + PADDLE_LENGTH - .5
+
+
+def sweep_ball(y: float, x: float, vy: float, vx: float, rows: int, faces: tuple, paddles: tuple) -> tuple:
+    """
+    Move the ball along its velocity for one step, bouncing on walls and paddles on the way.
+
+    The ball bounces off the top and bottom walls, and off the faces of the left and right `paddles` on the
+    lines x = `faces`. Its path is swept rather than sampled at the end of the step, so it cannot go through
+    a paddle however fast it moves. Return the new position and velocity.
+    """
+    top, bottom = 1, rows - 2
+    left_face, right_face = faces
+    left_y, right_y = paddles
+    remaining = 1.
+    for _ in range(MAX_BOUNCES):
+        # Earliest wall or paddle face crossed in the rest of the step
+        hit, time = None, remaining
+        if vy < 0 and y + vy * remaining <= top:
+            hit, time = "wall", (top - y) / vy
+        elif vy > 0 and y + vy * remaining >= bottom:
+            hit, time = "wall", (bottom - y) / vy
+        if vx < 0 and x >= left_face >= x + vx * remaining:
+            face_time = (left_face - x) / vx
+            if face_time <= time and alongside(y + vy * face_time, left_y):
+                hit, time = "paddle", face_time
+        elif vx > 0 and x <= right_face <= x + vx * remaining:
+            face_time = (right_face - x) / vx
+            if face_time <= time and alongside(y + vy * face_time, right_y):
+                hit, time = "paddle", face_time
+
+        y, x = y + vy * time, x + vx * time
+        remaining -= time
+        if hit is None:
+            break
+        if hit == "wall":
+            vy = -vy
+        else:
+            vx = -vx
+    return y, x, vy, vx
+
+
+def intercept(y: float, x: float, vy: float, vx: float, face: float, rows: int) -> float:
+    """
+    Height at which the ball reaches the line x = `face`, bouncing on the top and bottom walls on the way.
+
+    Unfolding the bounces makes the path a straight line, which is then folded back between the walls, so the
+    cost does not depend on how many times the ball bounces. Works on NumPy arrays as well as on numbers.
+    """
+    top, bottom = 1, rows - 2
+    span = bottom - top
+    unfolded = y + vy * (face - x) / vx - top
+    return top + span - abs(span - unfolded % (2 * span))
+
+
+class PredictiveOpponent:
+    """
+    Computer paddle aiming where the ball will reach it, solved once each time the ball heads its way.
+
+    The paddle waits `reaction` steps before moving on each new solve, and aims off by a normal error of
+    `error` cells, which tune its difficulty. While the ball heads away, the paddle goes back to the middle.
+    """
+
+    def __init__(self, reaction: int = 0, error: float = 0.) -> None:
+        self.reaction = reaction
+        self.error = error
+        self.rally = None
+        self.target = None
+        self.wait = 0
+
+    def aim(self, game: "PongGame") -> None:
+        """Choose where to put the paddle for the ball served or bounced last."""
+        self.wait = self.reaction
+        middle = (game.rows - PADDLE_LENGTH) / 2
+        if game.speed[1] > 0:
+            ball_y = intercept(game.ball_y, game.ball_x, *game.speed, game.computer_x, game.rows)
+            middle = ball_y - (PADDLE_LENGTH - 1) / 2 + (game.rng.gauss(0, self.error) if self.error else 0)
+        self.target = min(max(round(middle), 1), game.rows - (PADDLE_LENGTH + 1))
+
+    def move(self, game: "PongGame") -> int:
+        """Cell the paddle moves this step: up (-1), down (1) or not (0)."""
+        rally = game.serves, game.speed[1] > 0
+        if rally != self.rally:
+            self.rally = rally
+            self.aim(game)
+        if self.wait:
+            self.wait -= 1
+            return 0
+        return (self.target > game.computer_y) - (self.target < game.computer_y)
+
+
+class PongGame:
+    """
+    Display-free Pong match between the player on the left and the computer on the right, first to 11 points.
+
+    The arena is `rows` by `columns` cells, walls included. The computer follows the ball with a random lag,
+    unless given an `opponent` such as `PredictiveOpponent`.
+    The ball has a float position and moves `ball_speed` cells diagonally each step, bouncing on paddles and
+    on the top and bottom walls, and a new ball is served from the net after each point.
+    """
+
+    def __init__(self, rng: random.Random = None, rows: int = ROWS, columns: int = COLUMNS,
+                 ball_speed: tuple = BALL_SPEED, opponent: PredictiveOpponent = None) -> None:
+        check_size(rows, columns)
+        self.rng = rng or random.Random()
+        self.rows, self.columns = rows, columns
+        self.ball_speed = ball_speed
+        self.opponent = opponent
+        self.serves = 0
+        self.player_x = 2
+        self.computer_x = columns - 3
+        self.reset()
+
+    def reset(self) -> None:
+        """Start the next match."""
+        speed_y, speed_x = self.ball_speed
+        self.speed = [self.rng.choice((-1, 1)) * speed_y, self.rng.choice((-1, 1)) * speed_x]
+        self.player = self.computer = 0
+        self.player_y = self.rows // 3
+        self.computer_y = self.rows // 3
+        self.serve()
+
+    def serve(self) -> None:
+        """Put a new ball at the net."""
+        self.serves += 1
+        self.ball_y = float(self.rng.randint(4, self.rows - 4))
+        self.ball_x = float(self.columns // 2 + 1)
+
+    @property
+    def ball_cell(self) -> tuple:
+        """Cell the ball is drawn in."""
+        return round(self.ball_y), round(self.ball_x)
+
+    @property
+    def over(self) -> bool:
+        """Whether the match is won."""
+        return WINNING_SCORE in (self.player, self.computer)
+
+    def move_player(self, step: int) -> None:
+        """Move the player paddle up (-1) or down (1) a cell, if not against a wall."""
+        if step > 0 and self.player_y < self.rows - (PADDLE_LENGTH + 1):
+            self.player_y += 1
+        elif step < 0 and self.player_y > 1:
+            self.player_y -= 1
+
+    def apply(self, player_input: int) -> None:
+        """Apply a player input."""
+        if player_input == UP_INPUT:
+            self.move_player(-1)
+        elif player_input == DOWN_INPUT:
+            self.move_player(1)
+        elif player_input == NEW_MATCH_INPUT:
+            self.reset()
+
+    def step(self) -> None:
+        """Move the computer and the ball, then bounce or score the ball."""
+        if self.over:
+            return
+
+        # Move the computer
+        if self.opponent is not None:
+            self.computer_y += self.opponent.move(self)
+        else:
+            if self.computer_y - self.rng.randint(0, 3) < self.ball_y \
+                    and self.computer_y < self.rows - (PADDLE_LENGTH + 1):
+                self.computer_y += 1
+            if self.computer_y + PADDLE_LENGTH > self.ball_y \
+                    and self.computer_y > 1:
+                self.computer_y -= 1
+
+        # Move the ball, bouncing on the walls and on the paddle faces facing the net
+        self.ball_y, self.ball_x, *self.speed = sweep_ball(
+            self.ball_y, self.ball_x, *self.speed, self.rows,
+            (self.player_x + 1, self.computer_x), (self.player_y, self.computer_y))
+
+        # Checks if the ball is going off the arena
+        if self.ball_x <= 1:
+            self.speed[0] = self.rng.choice((-1, 1)) * self.ball_speed[0]
+            self.serve()
+            self.computer += 1
+        elif self.ball_x >= self.columns - 2:
+            self.speed[0] = self.rng.choice((-1, 1)) * self.ball_speed[0]
+            self.serve()
+            self.player += 1
+
+
+class PongBatch:
+    """
+    Many independent display-free Pong matches stepped at once as NumPy arrays, following the rules of `PongGame`.
+
+    The player paddles are moved by the caller, e.g. a bot, before each step. Given an `opponent`, every
+    computer paddle plays like it.
+    """
+
+    def __init__(self, num_matches: int, rng: np.random.Generator = None, rows: int = ROWS,
+                 columns: int = COLUMNS, ball_speed: tuple = BALL_SPEED, opponent: PredictiveOpponent = None) -> None:
+        check_size(rows, columns)
+        self.num_matches = num_matches
+        self.rng = rng or np.random.default_rng()
+        self.rows, self.columns = rows, columns
+        self.ball_speed = ball_speed
+        self.opponent = opponent
+
+        # Predictive opponents' aim, steps left before moving, and the heading of the ball they aimed for
+        self.targets = np.zeros(num_matches, dtype=np.int64)
+        self.waits = np.zeros(num_matches, dtype=np.int64)
+        self.headings = np.zeros(num_matches, dtype=np.int64)
+        self.player_x = 2
+        self.computer_x = columns - 3
+
+        self.player_y = np.zeros(num_matches, dtype=np.int64)
+        self.computer_y = np.zeros(num_matches, dtype=np.int64)
+        self.ball_y = np.zeros(num_matches)
+        self.ball_x = np.zeros(num_matches)
+        self.speed_y = np.zeros(num_matches)
+        self.speed_x = np.zeros(num_matches)
+        self.player = np.zeros(num_matches, dtype=np.int64)
+        self.computer = np.zeros(num_matches, dtype=np.int64)
+
+        self.reset()
+
+    @property
+    def over(self) -> np.ndarray:
+        """Mask of the matches won."""
+        return (self.player == WINNING_SCORE) | (self.computer == WINNING_SCORE)
+
+    def reset(self, matches: np.ndarray = None) -> None:
+        """Start the next match for the given match indices or mask, all matches by default."""
+        matches = np.arange(self.num_matches) if matches is None else np.asarray(matches)
+        if matches.dtype == bool:
+            matches = np.flatnonzero(matches)
+
+        self.speed_y[matches] = self.rng.choice((-1, 1), size=len(matches)) * self.ball_speed[0]
+        self.speed_x[matches] = self.rng.choice((-1, 1), size=len(matches)) * self.ball_speed[1]
+        self.player[matches] = self.computer[matches] = 0
+        self.player_y[matches] = self.computer_y[matches] = self.rows // 3
+        self.serve(matches)
+
+    def serve(self, matches: np.ndarray) -> None:
+        """Put a new ball at the net for the given match indices."""
+        self.headings[matches] = 0
+        self.ball_y[matches] = self.rng.integers(4, self.rows - 3, size=len(matches))
+        self.ball_x[matches] = self.columns // 2 + 1
+
+    def move_players(self, steps: np.ndarray) -> None:
+        """Move each player paddle up (-1), down (1) or not (0) a cell, if not against a wall."""
+        steps = np.asarray(steps)
+        down = (steps > 0) & (self.player_y < self.rows - (PADDLE_LENGTH + 1))
+        up = (steps < 0) & (self.player_y > 1)
+        self.player_y += down.astype(np.int64) - up
+
+    def _move_predictive(self, playing: np.ndarray) -> None:
+        """Move the computer paddles of the `playing` matches like `PredictiveOpponent`."""
+        headings = np.where(self.speed_x > 0, 1, -1)
+        aiming = np.flatnonzero(playing & (headings != self.headings))
+        if len(aiming):
+            self.headings[aiming] = headings[aiming]
+            self.waits[aiming] = self.opponent.reaction
+
+            targets = np.full(len(aiming), (self.rows - PADDLE_LENGTH) / 2)
+            toward = headings[aiming] > 0
+            matches = aiming[toward]
+            ball_y = intercept(self.ball_y[matches], self.ball_x[matches], self.speed_y[matches],
+                               self.speed_x[matches], self.computer_x, self.rows)
+            targets[toward] = ball_y - (PADDLE_LENGTH - 1) / 2
+            if self.opponent.error:
+                targets[toward] += self.rng.normal(0, self.opponent.error, size=len(matches))
+            self.targets[aiming] = np.clip(np.round(targets), 1, self.rows - (PADDLE_LENGTH + 1))
+
+        ready = playing & (self.waits == 0)
+        self.waits[playing & ~ready] -= 1
+        self.computer_y += np.where(ready, np.sign(self.targets - self.computer_y), 0)
+
+    def _sweep(self, moving: np.ndarray) -> None:
+        """Move the ball of the `moving` matches for one step, bouncing on walls and paddles on the way."""
+        top, bottom = 1, self.rows - 2
+        left_face, right_face = self.player_x + 1, self.computer_x
+
+        # Most balls cross no wall or paddle face this step, and simply move
+        ends_y, ends_x = self.ball_y + self.speed_y, self.ball_x + self.speed_x
+        crossing = (ends_y <= top) | (ends_y >= bottom) | ((ends_x <= left_face) & (self.ball_x >= left_face)) \
+            | ((ends_x >= right_face) & (self.ball_x <= right_face))
+        free = moving & ~crossing
+        self.ball_y[free], self.ball_x[free] = ends_y[free], ends_x[free]
+
+        # Only the matches whose ball bounced keep moving for the rest of the step
+        matches = np.flatnonzero(moving & crossing)
+        remaining = np.ones(len(matches))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for _ in range(MAX_BOUNCES):
+                y, x = self.ball_y[matches], self.ball_x[matches]
+                vy, vx = self.speed_y[matches], self.speed_x[matches]
+
+                # Earliest wall or paddle face crossed in the rest of the step
+                ends = y + vy * remaining
+                hits_wall = ((vy < 0) & (ends <= top)) | ((vy > 0) & (ends >= bottom))
+                time = np.where(hits_wall, (np.where(vy < 0, top, bottom) - y) / vy, remaining)
+
+                ends = x + vx * remaining
+                left = (vx < 0) & (x >= left_face) & (left_face >= ends)
+                right = ~left & (vx > 0) & (x <= right_face) & (right_face <= ends)
+                face_time = (np.where(left, left_face, right_face) - x) / vx
+                paddle_y = np.where(left, self.player_y[matches], self.computer_y[matches])
+                face_y = y + vy * face_time
+                hits_paddle = (left | right) & (face_time <= time) \
+                    & (paddle_y - .5 <= face_y) & (face_y < paddle_y + PADDLE_LENGTH - .5)
+                time = np.where(hits_paddle, face_time, time)
+                hits_wall &= ~hits_paddle
+
+                self.ball_y[matches] = y + vy * time
+                self.ball_x[matches] = x + vx * time
+                self.speed_y[matches] = np.where(hits_wall, -vy, vy)
+                self.speed_x[matches] = np.where(hits_paddle, -vx, vx)
+
+                bounced = hits_wall | hits_paddle
+                matches, remaining = matches[bounced], (remaining - time)[bounced]
+                if not len(matches):
+                    break
+
+    def step(self) -> np.ndarray:
+        """
+        Step every match not yet won, like `PongGame.step`.
+
+        Return 1 for the matches where the player scored, -1 where the computer scored, and 0 elsewhere.
+        """
+        playing = ~self.over
+        computer_y, ball_y = self.computer_y, self.ball_y
+
+        # Move the computer
+        if self.opponent is not None:
+            self._move_predictive(playing)
+        else:
+            lag = self.rng.integers(0, 4, size=self.num_matches)
+            down = playing & (computer_y - lag < ball_y) & (computer_y < self.rows - (PADDLE_LENGTH + 1))
+            computer_y += down
+            up = playing & (computer_y + PADDLE_LENGTH > ball_y) & (computer_y > 1)
+            computer_y -= up
+
+        # Move the ball, bouncing on the walls and on the paddle faces facing the net, like `sweep_ball`
+        self._sweep(playing)
+        ball_x = self.ball_x
+
+        # Checks if the ball is going off the arena
+        scored = np.zeros(self.num_matches, dtype=np.int64)
+        scored[playing & (ball_x <= 1)] = -1
+        scored[playing & (ball_x >= self.columns - 2)] = 1
+
+        served = np.flatnonzero(scored)
+        self.speed_y[served] = self.rng.choice((-1, 1), size=len(served)) * self.ball_speed[0]
+        self.serve(served)
+        self.player += scored > 0
+        self.computer += scored < 0
+        return scored
@@ -0,0 +1,287 @@
+"""
+Deterministic session recording and replay.
+
+A session records the game played, the seed of its random number generator, its parameters and the inputs
+given on each tick. Replaying the inputs on a display-free game from the same seed reproduces the session,
+as fast as the game can be stepped, and its final state is checked against the recorded checksum.
+
+Games create their display-free game with `Session.create` and record each input they apply to it, so nothing
+else may draw from its random generator, or the replay takes another random path. Each adapter imports its
+game's engine only when creating a game, so recording one game does not load the others.
+
+Run `python -m replay <session file>...` from the repository root to replay and verify sessions.
+"""
+import random
+import struct
+import sys
+import time
+import zlib
+
+MAGIC = b"RPLY"
+VERSION = 1
+
+# Minesweeper actions, packed with the land they apply to in a single input value
+POKE_ACTION, FLAG_ACTION, RESET_ACTION = range(3)
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Append a non-negative integer in 7 bit groups, least significant first."""
+    while value >= 0x80:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> tuple:
+    """Read an integer written by `write_varint`, returning it with the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class SnakeReplay:
+    """Replays Snake sessions; inputs are the direction turned to on each tick it changed."""
+
+    ID = 1
+
+    @staticmethod
+    def create(seed: int, params: tuple) -> object:
+        """Create a game of the arena size in `params`."""
+        from snake_engine import SnakeGame
+
+        height, width = params
+        return SnakeGame(height, width, random.Random(seed))
+
+    @staticmethod
+    def apply(game: object, value: int) -> None:
+        """Apply an input."""
+        game.turn(value)
+
+    @staticmethod
+    def step(game: object) -> None:
+        """Play one tick."""
+        game.step()
+
+    @staticmethod
+    def state(game: object) -> bytes:
+        """Serialize the snake, food, score and whether the game is over."""
+        cells = [coord for cell in game.body for coord in cell]
+        return struct.pack(f"<{len(cells) + 4}q", *cells, *(game.food or (-1, -1)), game.score, game.over)
+
+
+class MinesweeperReplay:
+    """Replays Minesweeper sessions; inputs are actions packed with their land by `minesweeper_input`."""
+
+    ID = 2
+
+    @staticmethod
+    def create(seed: int, params: tuple) -> object:
+        """Create a game board of the size, mine count and kind in `params`."""
+        import numpy as np
+
+        from mine_engine import Minefield
+        from mine_solver import NoGuessMinefield
+
+        rows, cols, num_mines, no_guess = params
+        rng = np.random.default_rng(seed)
+        # Games start with a recorded reset, like every reset after them
+        return NoGuessMinefield(rows, cols, num_mines, rng) if no_guess else Minefield(rows, cols, num_mines, rng)
+
+    @staticmethod
+    def apply(field: object, value: int) -> None:
+        """Apply an input."""
+        land, action = divmod(value, 3)
+        row, col = divmod(land, field.shape[1])
+        if action == POKE_ACTION:
+            field.poke(row, col)
+        elif action == FLAG_ACTION:
+            field.flag(row, col)
+        else:
+            field.reset()
+
+    @staticmethod
+    def step(field: object) -> None:
+        """Play one tick, in which nothing happens without inputs."""
+
+    @staticmethod
+    def state(field: object) -> bytes:
+        """Serialize the lands, mine count and exploded land."""
+        return field.lands.tobytes() + struct.pack("<3q", field.num_mines, *(field.exploded or (-1, -1)))
+
+
+class PongReplay:
+    """Replays Pong sessions; inputs are the player inputs of `pong_engine`, given before each tick."""
+
+    ID = 3
+
+    @staticmethod
+    def create(seed: int, params: tuple) -> object:
+        """Create a match in an arena of the size in `params`, then of a predictive opponent's reaction and error."""
+        from pong_engine import COLUMNS, ROWS, PongGame, PredictiveOpponent
+
+        rows, columns, *opponent = params or (ROWS, COLUMNS)
+        # The aim error is recorded in hundredths of a cell
+        if opponent:
+            reaction, error = opponent
+            opponent = PredictiveOpponent(reaction, error / 100)
+        return PongGame(random.Random(seed), rows, columns, opponent=opponent or None)
+
+    @staticmethod
+    def apply(game: object, value: int) -> None:
+        """Apply an input."""
+        game.apply(value)
+
+    @staticmethod
+    def step(game: object) -> None:
+        """Play one tick."""
+        game.step()
+
+    @staticmethod
+    def state(game: object) -> bytes:
+        """Serialize the paddles, ball and scores."""
+        return struct.pack("<2q4d2q", game.player_y, game.computer_y, game.ball_y, game.ball_x, *game.speed,
+                           game.player, game.computer)
+
+
+GAMES = {
+    "snake": SnakeReplay,
+    "minesweeper": MinesweeperReplay,
+    "pong": PongReplay,
+}
+
+
+def minesweeper_input(action: int, row: int = 0, col: int = 0, cols: int = 0) -> int:
+    """Pack a Minesweeper action on the land at (row, col) of a board `cols` wide in an input value."""
+    return (row * cols + col) * 3 + action
+
+
+def checksum(game: str, state: object) -> int:
+    """Checksum of the state of a game, as recorded at the end of a session."""
+    return zlib.crc32(GAMES[game].state(state))
+
+
+class Session:
+    """
+    Inputs of a played game, with what is needed to play them again.
+
+    Sessions are saved as the header, then each input as its tick counted from the previous input and its value,
+    both as variable length integers, so idle ticks take no space.
+    """
+
+    def __init__(self, game: str, seed: int = None, params: tuple = ()) -> None:
+        self.game = game
+        self.seed = random.randrange(2 ** 63) if seed is None else seed
+        self.params = tuple(int(param) for param in params)
+
+        # Inputs as (tick, value) pairs in order
+        self.events = []
+        self.ticks = 0
+        self.checksum = None
+
+    def create(self) -> object:
+        """Create the display-free game the session is played on, seeded like the recorded one."""
+        return GAMES[self.game].create(self.seed, self.params)
+
+    def record(self, tick: int, value: int) -> None:
+        """Record an input given on a tick."""
+        self.events.append((tick, value))
+
+    def finish(self, ticks: int, state: object) -> None:
+        """Record how many ticks the session lasted, and the checksum of the game state it ended on."""
+        self.ticks = ticks
+        self.checksum = checksum(self.game, state)
+
+    def to_bytes(self) -> bytes:
+        """Encode the session in its binary format."""
+        buffer = bytearray(MAGIC)
+        buffer += struct.pack("<BBQ", VERSION, GAMES[self.game].ID, self.seed)
+        write_varint(buffer, len(self.params))
+        for param in self.params:
+            write_varint(buffer, param)
+
+        write_varint(buffer, len(self.events))
+        previous = 0
+        for tick, value in self.events:
+            write_varint(buffer, tick - previous)
+            write_varint(buffer, value)
+            previous = tick
+
+        write_varint(buffer, self.ticks)
+        buffer += struct.pack("<I", self.checksum or 0)
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Session":
+        """Decode a session from its binary format."""
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a recorded session.")
+        version, game_id, seed = struct.unpack_from("<BBQ", data, len(MAGIC))
+        if version != VERSION:
+            raise ValueError(f"Unsupported session version {version}.")
+        position = len(MAGIC) + struct.calcsize("<BBQ")
+
+        num_params, position = read_varint(data, position)
+        params = []
+        for _ in range(num_params):
+            param, position = read_varint(data, position)
+            params.append(param)
+
+        game = next(name for name, replay in GAMES.items() if replay.ID == game_id)
+        session = cls(game, seed, params)
+        num_events, position = read_varint(data, position)
+        tick = 0
+        for _ in range(num_events):
+            delta, position = read_varint(data, position)
+            value, position = read_varint(data, position)
+            tick += delta
+            session.events.append((tick, value))
+
+        session.ticks, position = read_varint(data, position)
+        session.checksum, = struct.unpack_from("<I", data, position)
+        return session
+
+    def save(self, path: str) -> None:
+        """Save the session to a file."""
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Session":
+        """Load a session saved to a file."""
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def replay(self) -> object:
+        """Play the recorded inputs again on a display-free game, as fast as possible, and return the game."""
+        replay = GAMES[self.game]
+        game = self.create()
+        events = iter(self.events)
+        event = next(events, None)
+
+        # Inputs of a tick come before its step; inputs after the last step still apply
+        for tick in range(self.ticks + 1):
+            while event is not None and event[0] == tick:
+                replay.apply(game, event[1])
+                event = next(events, None)
+            if tick < self.ticks:
+                replay.step(game)
+        return game
+
+    def verify(self) -> bool:
+        """Whether replaying the session ends on the recorded game state."""
+        return checksum(self.game, self.replay()) == self.checksum
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        session = Session.load(path)
+        start = time.perf_counter()
+        matches = session.verify()
+        seconds = time.perf_counter() - start
+        print(f"{path}: {session.game}, {len(session.events)} inputs over {session.ticks} ticks, "
+              f"replayed in {seconds * 1e3:.1f} ms, {'matches' if matches else 'DOES NOT MATCH'}")
@@ -0,0 +1,249 @@
+"""
+Multi-core match runner, playing large numbers of seeded games between bots and the display-free engines.
+
+Games are sharded over a process pool in chunks of consecutive games. Each worker writes one row per game in a
+results array in shared memory, so only the bounds of each chunk are pickled back, and summary statistics are
+updated as chunks complete. Game `i` is always played from `seed + i`, created like a recorded session of
+`replay`, so its result does not depend on how the games were sharded.
+
+Bots draw from their own random generators, seeded like their game, as nothing else may draw from the game's.
+
+Run `python -m runner <game> [-n games] [-j workers] [-s seed]` from the repository root.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from mine_engine import Minefield
+from mine_solver import Solver
+from pong_engine import (
+    COLUMNS, DOWN_INPUT, PADDLE_LENGTH, ROWS, UP_INPUT, PongGame
+)
+from replay import GAMES
+from snake_engine import DIRECTION_STEPS, SnakeGame
+
+# One row per game: its seed, score, length, ticks played, whether the bot won and the time the game took.
+# Score and length are the food eaten and snake length in Snake, the player points and points played in Pong,
+# and the lands uncovered and guesses taken in Minesweeper
+RESULT_DTYPE = np.dtype([
+    ("seed", np.uint64), ("score", np.int32), ("length", np.int32), ("ticks", np.int64), ("won", np.bool_),
+    ("seconds", np.float64),
+])
+
+# Parameters of each game, as in its recorded sessions: those `playSnake`, `playPong` against the predictive
+# opponent, and `playMinesweeper` start with
+PARAMS = {
+    "snake": (24, 80),
+    "pong": (ROWS, COLUMNS, 6, 200),
+    "minesweeper": (8, 8, 10, 1),
+}
+
+# Ticks after which a game still going, e.g. a rally neither paddle misses, is stopped and counted as lost
+MAX_TICKS = 100_000
+
+# Most games per chunk, and fewest chunks per worker, so the pool stays balanced while results stream in
+CHUNK_GAMES = 256
+CHUNKS_PER_WORKER = 4
+
+
+def snake_direction(game: SnakeGame) -> int:
+    """Direction of the bot: the one closest to the food not running into a wall or the snake, or straight on."""
+    y, x = game.body.head
+    food_y, food_x = game.food
+    best, best_distance = game.direction, None
+    for direction, (dy, dx) in enumerate(DIRECTION_STEPS):
+        cell = y + dy, x + dx
+        if direction == game.direction ^ 1 or game.hits_wall(cell) or (
+                cell in game.body and cell != game.body.tail):
+            continue
+        distance = abs(food_y - cell[0]) + abs(food_x - cell[1])
+        if best_distance is None or distance < best_distance:
+            best, best_distance = direction, distance
+    return best
+
+
+def play_snake(game: SnakeGame, seed: int, max_ticks: int) -> tuple:
+    """Play a Snake game with the greedy bot, returning its score, length, ticks and whether it filled the arena."""
+    ticks = 0
+    while not game.over and ticks < max_ticks:
+        game.step(snake_direction(game))
+        ticks += 1
+    return game.score, len(game.body), ticks, game.food is None
+
+
+def pong_input(game: PongGame, rng: random.Random) -> int:
+    """Input of the bot, following the ball with a random lag like the classic computer paddle, if any."""
+    step = (game.player_y - rng.randint(0, 3) < game.ball_y) - (game.player_y + PADDLE_LENGTH > game.ball_y)
+    return DOWN_INPUT if step > 0 else UP_INPUT if step < 0 else None
+
+
+def play_pong(game: PongGame, seed: int, max_ticks: int) -> tuple:
+    """Play a Pong match with the bot as the player, returning its points, points played, ticks and whether it won."""
+    rng = random.Random(seed)
+    ticks = 0
+    while not game.over and ticks < max_ticks:
+        player_input = pong_input(game, rng)
+        if player_input:
+            game.apply(player_input)
+        game.step()
+        ticks += 1
+    return game.player, game.player + game.computer, ticks, game.over and game.player > game.computer
+
+
+def play_minesweeper(field: Minefield, seed: int, max_ticks: int) -> tuple:
+    """
+    Play a Minesweeper game with the solver, returning the lands uncovered, guesses, ticks and whether it was won.
+
+    A tick uncovers every land deduced safe, or makes one guess when none is.
+    """
+    solver = Solver(field, np.random.default_rng(seed))
+    ticks = guesses = 0
+    while not field.over and ticks < max_ticks:
+        ticks += 1
+        if not solver.step():
+            land = solver.guess()
+            if land is None:
+                break
+            solver.poke(*land)
+            guesses += 1
+    return field.num_uncovered, guesses, ticks, field.won
+
+
+PLAYERS = {
+    "snake": play_snake,
+    "pong": play_pong,
+    "minesweeper": play_minesweeper,
+}
+
+
+def play(game: str, seed: int, params: tuple = None, max_ticks: int = MAX_TICKS) -> tuple:
+    """Play one seeded game with its bot, returning its score, length, ticks and whether the bot won."""
+    return PLAYERS[game](GAMES[game].create(seed, params or PARAMS[game]), seed, max_ticks)
+
+
+class Summary:
+    """Running statistics of game results, updated a chunk of results at a time."""
+
+    def __init__(self, game: str, total: int) -> None:
+        self.game = game
+        self.total = total
+        self.count = self.wins = self.ticks = 0
+        self.score_sum = self.score_squares = 0.
+        self.best = None
+        self.seconds = 0.
+
+    def add(self, results: np.ndarray) -> None:
+        """Take results into account."""
+        if not len(results):
+            return
+        scores = results["score"].astype(np.float64)
+        self.count += len(results)
+        self.wins += int(np.count_nonzero(results["won"]))
+        self.ticks += int(results["ticks"].sum())
+        self.score_sum += float(scores.sum())
+        self.score_squares += float(np.square(scores).sum())
+        best = int(results["score"].max())
+        self.best = best if self.best is None else max(self.best, best)
+        self.seconds += float(results["seconds"].sum())
+
+    @property
+    def mean(self) -> float:
+        """Mean score."""
+        return self.score_sum / self.count if self.count else 0.
+
+    @property
+    def std(self) -> float:
+        """Standard deviation of the scores."""
+        return math.sqrt(max(self.score_squares / self.count - self.mean ** 2, 0.)) if self.count else 0.
+
+    def __str__(self) -> str:
+        return (f"{self.game}: {self.count}/{self.total} games, won {self.wins} "
+                f"({self.wins / max(self.count, 1):.1%}), score {self.mean:.2f} ± {self.std:.2f} "
+                f"(best {self.best}), {self.ticks} ticks")
+
+
+# Results array of the worker process, in the shared memory it attached to
+_memory = None
+_results = None
+
+
+def _attach(name: str, num_games: int) -> None:
+    """Attach a worker process to the shared results array."""
+    global _memory, _results
+    _memory = shared_memory.SharedMemory(name=name)
+    _results = np.ndarray(num_games, dtype=RESULT_DTYPE, buffer=_memory.buf)
+
+
+def _play_chunk(task: tuple) -> tuple:
+    """Play the games of a task from `start` to `stop`, writing results in the shared array; return the bounds."""
+    game, seed, params, max_ticks, start, stop = task
+    for index in range(start, stop):
+        begin = time.perf_counter()
+        result = play(game, seed + index, params, max_ticks)
+        _results[index] = (seed + index, *result, time.perf_counter() - begin)
+    return start, stop
+
+
+def chunks(num_games: int, workers: int) -> list:
+    """Bounds of the chunks the games are sharded in."""
+    size = max(1, min(CHUNK_GAMES, math.ceil(num_games / (workers * CHUNKS_PER_WORKER))))
+    return [(start, min(start + size, num_games)) for start in range(0, num_games, size)]
+
+
+def run(game: str, num_games: int, workers: int = None, seed: int = 0, params: tuple = None,
+        max_ticks: int = MAX_TICKS, progress: callable = None) -> tuple:
+    """
+    Play `num_games` seeded games over a pool of `workers` processes, by default one per core.
+
+    `progress` is called with the summary each time a chunk of games completes. Return the results, one row
+    per game in order, and their summary.
+    """
+    workers = workers or os.cpu_count() or 1
+    params = tuple(params or PARAMS[game])
+    summary = Summary(game, num_games)
+    memory = shared_memory.SharedMemory(create=True, size=max(num_games, 1) * RESULT_DTYPE.itemsize)
+    try:
+        results = np.ndarray(num_games, dtype=RESULT_DTYPE, buffer=memory.buf)
+        tasks = [(game, seed, params, max_ticks, start, stop) for start, stop in chunks(num_games, workers)]
+        with Pool(workers, _attach, (memory.name, num_games)) as pool:
+            for start, stop in pool.imap_unordered(_play_chunk, tasks):
+                summary.add(results[start:stop])
+                if progress is not None:
+                    progress(summary)
+        results = results.copy()
+    finally:
+        memory.close()
+        memory.unlink()
+    return results, summary
+
+
+def main() -> int:
+    """Run games from the command line, printing their summary as they complete."""
+    parser = argparse.ArgumentParser(prog="python -m runner", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("game", choices=PLAYERS)
+    parser.add_argument("-n", "--games", type=int, default=1_000, help="games to play (default %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default one per core)")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first game (default %(default)s)")
+    parser.add_argument("-p", "--params", type=int, nargs="+",
+                        help="game parameters, as recorded in sessions (default those the game starts with)")
+    parser.add_argument("-o", "--output", help="save the results to this .npy file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results, summary = run(args.game, args.games, args.workers, args.seed, args.params,
+                           progress=lambda summary: print(f"\r{summary}", end="", flush=True))
+    seconds = time.perf_counter() - start
+    print(f"\n{args.games / seconds:.1f} games/s over {seconds:.2f} s")
+    if args.output:
+        np.save(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
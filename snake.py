@@ -1,9 +1,79 @@
 # ** Credit where credit due: barebones snake based off https://github.com/TheAILearner/Snake-Game-using-Python-Curses/blob/master/snake_game_using_curses.py
 
-def playSnake():
-    import curses
+import curses
+from collections import deque
+
+from gameloop import GameLoop, present
+from perf import OVERLAY_KEY, FrameTimer
+from replay import Session
+from snake_engine import DOWN, LEFT, RIGHT, UP, SnakeGame
+
+# Direction each arrow key turns the snake to
+ARROW_TURNS = {curses.KEY_LEFT: LEFT, curses.KEY_RIGHT: RIGHT, curses.KEY_UP: UP, curses.KEY_DOWN: DOWN}
+
+# Most turns pressed ahead of the moves taking them; older ones are dropped, so a held key cannot queue up lag
+MAX_TURNS = 2
+
+
+class SnakeRenderer:
+    """
+    Draws a SnakeGame on a curses window.
+
+    The border is drawn once and the score only when it changes; each move only redraws the head and the cell
+    the tail left, and every change of a frame goes to the terminal in a single batched update.
+    """
+
+    def __init__(self, win: object, game: SnakeGame) -> None:
+        self.win = win
+        self.game = game
+        self.score = None
+
+    def score_text(self) -> str:
+        """Text of the score shown at the top left of the arena."""
+        return "Score: {}".format(self.game.score)
+
+    def draw_all(self) -> None:
+        """Draw the border, food, snake and score, e.g. for the first frame."""
+        self.win.erase()
+        # border params: left side, right side, top side, bottom side, top left, top right, bottom left, bottom right
+        #  pass 0 for default
+        self.win.border(0)
+        self.win.addch(self.game.food[0], self.game.food[1], curses.ACS_DIAMOND)
+        for y, x in self.game.body:
+            self.win.addch(y, x, '■')
+        self.score = None
+        self.draw_score()
+
+    def draw_move(self, last: tuple) -> None:
+        """Draw one move of the snake, given the cell its tail left, if any."""
+        if last:
+            self.win.addch(last[0], last[1], ' ')
+        else:
+            self.win.addch(self.game.food[0], self.game.food[1], curses.ACS_DIAMOND)
+
+        # display snake, arrows that face in current bearing of snake
+        head = self.game.body.head
+        self.win.addch(head[0], head[1], '■' if self.game.direction in (LEFT, RIGHT) else '█')
+
+        # the snake may run over the score, which then needs drawing again
+        if any(cell and cell[0] == 1 and cell[1] <= len(self.score_text()) for cell in (last, head)):
+            self.score = None
+
+    def draw_score(self) -> None:
+        """Draw the score if it changed since it was last drawn."""
+        if self.game.score != self.score:
+            self.score = self.game.score
+            self.win.addstr(1, 1, self.score_text(), curses.A_UNDERLINE)
+
+    def present(self) -> None:
+        """Send the changes of the frame to the terminal at once."""
+        self.draw_score()
+        present(self.win)
+
+
+def playSnake(replay_path: str = None) -> None:
+    """Play Snake on the whole terminal, saving the session to `replay_path` if given."""
     import curses.ascii
-    import random
     import time
 
     #initialize screen (different from game window)
@@ -17,115 +87,81 @@ def playSnake():
     win.keypad(1)
     curses.curs_set(0) # make cursor invisible
 
-    # Initial Snake and food position, y x
-    snake_head = [10,15]
-    snake_position = [[15,10],[14,10],[13,10]]
-    food_position = [10,45]
-    score = 0
-
-    # display food
-    win.addch(food_position[0], food_position[1], curses.ACS_DIAMOND)
-
-    prev_button_direction = 1
-    button_direction = 1
-    key = curses.KEY_RIGHT
-
-    speed = 60 # timeout time of window. lower timeout time will mean faster game
-
-    def hitsFood(score):
-        food_position = [random.randint(1,winHeight-2),random.randint(1,winWidth-2)]
-        score += 1
-        return food_position, score
-
-    def hitsWall(snake_head):
-        if snake_head[0]>=winHeight-1 or snake_head[0]<=0 or snake_head[1]>=winWidth-1 or snake_head[1]<=0 :
-            return True
-        else:
-            return False
-
-    def hitsSelf(snake_position):
-        snake_head = snake_position[0]
-        if snake_head in snake_position[1:]:
-            return True
-        else:
-            return False
-
-
-    while True:
-        """
-        border params: left side, right side, top side, bottom side, top left, top right, bottom left, bottom right
-        pass 0 for default
-        """
-        win.border(0)
-        """
-        makes the window wait 100 miliseconds for an input,
-        allowing the player to start in a different direction if they wanted to
-        """
-        win.timeout(speed)
-
-        next_key = win.getch()
-
-        if next_key == -1:
-            key = key
-        else:
-            key = next_key
-
-        # 0-Left, 1-Right, 3-Up, 2-Down
-        if key == curses.KEY_LEFT and prev_button_direction != 1:
-            button_direction = 0
-        elif key == curses.KEY_RIGHT and prev_button_direction != 0:
-            button_direction = 1
-        elif key == curses.KEY_UP and prev_button_direction != 2:
-            button_direction = 3
-        elif key == curses.KEY_DOWN and prev_button_direction != 3:
-            button_direction = 2
-        else:
-            print(" ") # the one solution i have found to get rid of the incorrect keys getting appended to the score (they disappear after short delay)
-
-        prev_button_direction = button_direction
-
-        # Change the head position based on the button direction
-        if button_direction == 1:
-            snake_head[1] += 1
-        elif button_direction == 0:
-            snake_head[1] -= 1
-        elif button_direction == 2:
-            snake_head[0] += 1
-        elif button_direction == 3:
-            snake_head[0] -= 1
-        else:
-            pass
-
-        # Increase Snake length on eating food
-        if snake_head == food_position:
-            food_position, score = hitsFood(score)
-            snake_position.insert(0, list(snake_head))
-            win.addch(food_position[0], food_position[1], curses.ACS_DIAMOND)
-
-        else:
-            snake_position.insert(0, list(snake_head))
-            last = snake_position.pop()
-            win.addch(last[0], last[1], ' ')
-
-        # display snake, arrows that face in current bearing of snake
-        if button_direction == 1:
-            win.addch(snake_position[0][0], snake_position[0][1], '■')
-        elif button_direction == 0:
-            win.addch(snake_position[0][0], snake_position[0][1], '■')
-        elif button_direction == 3:
-            win.addch(snake_position[0][0], snake_position[0][1], '█')
-        elif button_direction == 2:
-            win.addch(snake_position[0][0], snake_position[0][1], '█')
-
-
-        win.addstr(1, 1, "Score: {}".format(score), curses.A_UNDERLINE)
-
-        # On collision kill the snake
-        if hitsWall(snake_head) or hitsSelf(snake_position):
+    # display-free game holding the snake, food and score, recorded for replay; the snake starts in the middle
+    # heading right
+    session = Session("snake", params=(winHeight, winWidth))
+    game = session.create()
+    ticks = 0
+    recorded_direction = None
+
+    # draw the border, food, snake and score once, then only what changes
+    renderer = SnakeRenderer(win, game)
+    renderer.draw_all()
+    renderer.present()
+
+    button_direction = RIGHT
+    # turns pressed since the last move, taken one per move so quick presses are not lost
+    turns = deque(maxlen=MAX_TURNS)
+
+    tick_rate = 1000 / 60 # moves per second, decoupled from how fast keys are pressed
+    loop = GameLoop(win, tick_rate)
+
+    # times input, moves, drawing and output of each frame, shown over the bottom of the arena with OVERLAY_KEY
+    timer = FrameTimer(1 / tick_rate, "snake")
+
+    for keys, steps in loop.frames():
+        timer.begin()
+        # 0-Left, 1-Right, 3-Up, 2-Down; the game ignores turning back onto the snake
+        for key in keys:
+            if key == OVERLAY_KEY:
+                timer.toggle()
+                # the arena under a hidden overlay needs drawing again
+                if not timer.overlay:
+                    renderer.draw_all()
+            elif key in ARROW_TURNS:
+                # a held key repeats, so skip turning where the snake already heads once the queued turns are taken
+                if ARROW_TURNS[key] != (turns[-1] if turns else button_direction):
+                    turns.append(ARROW_TURNS[key])
+            else:
+                print(" ") # the one solution i have found to get rid of the incorrect keys getting appended to the score (they disappear after short delay)
+        timer.mark("input")
+
+        for _ in range(steps):
+            if turns:
+                button_direction = turns.popleft()
+
+            if button_direction != recorded_direction:
+                session.record(ticks, button_direction)
+                recorded_direction = button_direction
+
+            # Move the snake, growing it on eating food
+            last = game.step(button_direction)
+            ticks += 1
+            timer.mark("update")
+
+            # On collision kill the snake
+            if game.over:
+                break
+
+            renderer.draw_move(last)
+            timer.mark("draw")
+
+        if game.over:
             break
 
+        if steps:
+            timer.draw(win, winHeight - 3, 1)
+            timer.mark("draw")
+            renderer.present()
+            timer.mark("output")
+        timer.end(loop.dropped)
+
+    session.finish(ticks, game)
+    if replay_path:
+        session.save(replay_path)
+    timer.export()
 
-    sc.addstr(10, 30, f"FINAL SCORE: {score}")
+    sc.addstr(10, 30, f"FINAL SCORE: {game.score}")
     sc.addstr(12, 30, "shutting down in a couple seconds...")
     sc.refresh()
     time.sleep(2.5)
@@ -0,0 +1,325 @@
+import random
+from collections import deque
+
+import numpy as np
+
+
+class FreeCells:
+    """
+    Cells of a grid not covered by the snake, inside a `margin` of wall cells, as (y, x) tuples.
+
+    Free cells are the first `size` entries of an array of flat cell indices, with the slot of each cell in
+    another array, so a cell is added or removed by swapping it with the last free cell, and a free cell is
+    sampled with a single random index however full the grid is.
+    """
+
+    def __init__(self, height: int, width: int, margin: int = 0) -> None:
+        self.height, self.width = height, width
+
+        inside = np.zeros((height, width), dtype=bool)
+        inside[margin:height - margin, margin:width - margin] = True
+        dtype = np.int32 if height * width < 2 ** 31 else np.int64
+        self.cells = np.flatnonzero(inside).astype(dtype)
+        self.size = len(self.cells)
+
+        # Slot of each cell in `cells`, or -1 for walls
+        self.slots = np.full(height * width, -1, dtype=dtype)
+        self.slots[self.cells] = np.arange(self.size, dtype=dtype)
+
+        # Walls are never free, so remember which cells may be added back
+        self.inside = inside.reshape(-1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _index(self, cell: tuple) -> int:
+        """Flat index of a cell, or -1 for cells off the grid."""
+        y, x = cell
+        return y * self.width + x if 0 <= y < self.height and 0 <= x < self.width else -1
+
+    def __contains__(self, cell: tuple) -> bool:
+        index = self._index(cell)
+        return index >= 0 and 0 <= self.slots[index] < self.size
+
+    def discard(self, cell: tuple) -> None:
+        """Mark a cell as covered, swapping the last free cell into its slot."""
+        index = self._index(cell)
+        if index < 0:
+            return
+        slot = self.slots[index]
+        if 0 <= slot < self.size:
+            self.size -= 1
+            last = self.cells[self.size]
+            self.cells[slot], self.slots[last] = last, slot
+            self.cells[self.size], self.slots[index] = index, self.size
+
+    def add(self, cell: tuple) -> None:
+        """Mark a cell inside the walls as free again, appending it after the last free cell."""
+        index = self._index(cell)
+        if index < 0 or not self.inside[index]:
+            return
+        slot = self.slots[index]
+        if slot >= self.size:
+            first = self.cells[self.size]
+            self.cells[slot], self.slots[first] = first, slot
+            self.cells[self.size], self.slots[index] = index, self.size
+            self.size += 1
+
+    def sample(self, rng: random.Random = random) -> tuple:
+        """Pick a free cell at random, or None once the snake covers the whole grid."""
+        if not self.size:
+            return None
+        return divmod(int(self.cells[rng.randrange(self.size)]), self.width)
+
+
+class SnakeBody:
+    """
+    Cells of a snake, head first, as (y, x) tuples.
+
+    Cells are kept in a deque, and in a set for membership, so moving, growing and checking for
+    self-collision cost the same however long the snake is. Given `free_cells`, the cells the snake covers
+    are kept out of them.
+    """
+
+    def __init__(self, cells: list, free_cells: FreeCells = None) -> None:
+        self.cells = deque(cells)
+        self.occupied = set(self.cells)
+
+        self.free_cells = free_cells
+        if free_cells is not None:
+            for cell in self.cells:
+                free_cells.discard(cell)
+
+        # Whether the last move ran the head into the body
+        self.crashed = False
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __iter__(self) -> iter:
+        return iter(self.cells)
+
+    def __contains__(self, cell: tuple) -> bool:
+        return cell in self.occupied
+
+    @property
+    def head(self) -> tuple:
+        """Cell of the head."""
+        return self.cells[0]
+
+    @property
+    def tail(self) -> tuple:
+        """Cell of the tail end."""
+        return self.cells[-1]
+
+    def move(self, head: tuple, grow: bool = False) -> tuple:
+        """Move the head to `head`, dropping the tail unless growing, and return the dropped cell, if any."""
+        tail = None
+        if not grow:
+            # The tail moves away first, so the head can follow it into the cell it leaves
+            tail = self.cells.pop()
+            self.occupied.discard(tail)
+            if self.free_cells is not None:
+                self.free_cells.add(tail)
+
+        self.crashed = head in self.occupied
+        self.cells.appendleft(head)
+        self.occupied.add(head)
+        if self.free_cells is not None:
+            self.free_cells.discard(head)
+        return tail
+
+
+# Directions, as keyed in playSnake, and the (y, x) step of each; opposite directions differ in the last bit
+LEFT, RIGHT, DOWN, UP = range(4)
+DIRECTION_STEPS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+
+START_LENGTH = 3
+
+
+class SnakeGame:
+    """
+    Display-free Snake game, inside a one cell wall around a `height` by `width` arena.
+
+    The snake starts in the middle of the arena heading right, and ignores turns back onto itself.
+    """
+
+    def __init__(self, height: int, width: int, rng: random.Random = None) -> None:
+        self.height, self.width = height, width
+        self.rng = rng or random.Random()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start the next game."""
+        self.free_cells = FreeCells(self.height, self.width, margin=1)
+        y, x = self.height // 2, self.width // 2
+        self.body = SnakeBody([(y, x - i) for i in range(START_LENGTH)], self.free_cells)
+        self.direction = RIGHT
+        self.food = self.free_cells.sample(self.rng)
+        self.score = 0
+        self.over = False
+
+    def hits_wall(self, cell: tuple) -> bool:
+        """Whether a cell is on or beyond the wall."""
+        y, x = cell
+        return not (0 < y < self.height - 1 and 0 < x < self.width - 1)
+
+    def turn(self, direction: int) -> None:
+        """Turn to `direction` unless it heads back onto the snake."""
+        if direction != self.direction ^ 1:
+            self.direction = direction
+
+    def step(self, direction: int = None) -> tuple:
+        """
+        Turn to `direction` unless it heads back onto the snake, then move one cell.
+
+        Return the cell the tail left, if any, for redrawing.
+        """
+        if self.over:
+            return None
+        if direction is not None:
+            self.turn(direction)
+
+        dy, dx = DIRECTION_STEPS[self.direction]
+        y, x = self.body.head
+        head = y + dy, x + dx
+        if self.hits_wall(head):
+            self.over = True
+            return None
+
+        # Increase Snake length on eating food
+        if head == self.food:
+            self.body.move(head, grow=True)
+            self.score += 1
+            self.food = self.free_cells.sample(self.rng)
+            # No free cell is left once the snake fills the whole arena
+            self.over = self.body.crashed or self.food is None
+            return None
+
+        tail = self.body.move(head)
+        self.over = self.body.crashed
+        return tail
+
+
+class SnakeBatch:
+    """
+    Many independent display-free Snake games stepped at once, following the rules of `SnakeGame`.
+
+    Cells are flat indices into a `height` by `width` arena. Each body is a ring buffer of cells, head first
+    from `starts`, with an occupancy grid per game for self-collision, so a step costs a few NumPy operations
+    on all games however long the snakes are.
+    """
+
+    def __init__(self, num_games: int, height: int, width: int, rng: np.random.Generator = None) -> None:
+        self.num_games, self.height, self.width = num_games, height, width
+        self.rng = rng or np.random.default_rng()
+
+        self.walls = np.ones((height, width), dtype=bool)
+        self.walls[1:-1, 1:-1] = False
+        self.walls = self.walls.reshape(-1)
+        self.steps = np.array([dy * width + dx for dy, dx in DIRECTION_STEPS])
+
+        # The snake can at most fill the whole arena
+        capacity = (height - 2) * (width - 2)
+        self.rings = np.zeros((num_games, capacity), dtype=np.int32)
+        self.starts = np.zeros(num_games, dtype=np.int64)
+        self.lengths = np.zeros(num_games, dtype=np.int64)
+        self.occupied = np.zeros((num_games, height * width), dtype=bool)
+
+        self.directions = np.zeros(num_games, dtype=np.int64)
+        self.food = np.zeros(num_games, dtype=np.int64)
+        self.scores = np.zeros(num_games, dtype=np.int64)
+        self.over = np.zeros(num_games, dtype=bool)
+
+        self.reset()
+
+    @property
+    def heads(self) -> np.ndarray:
+        """Head cell of each game."""
+        return self.rings[np.arange(self.num_games), self.starts]
+
+    def reset(self, games: np.ndarray = None) -> None:
+        """Start the next game for the given game indices or mask, all games by default."""
+        games = np.arange(self.num_games) if games is None else np.asarray(games)
+        if games.dtype == bool:
+            games = np.flatnonzero(games)
+
+        head = (self.height // 2) * self.width + self.width // 2
+        cells = head - np.arange(START_LENGTH)
+        self.occupied[games] = False
+        self.occupied[games[:, None], cells] = True
+        self.rings[games, :START_LENGTH] = cells
+        self.starts[games] = 0
+        self.lengths[games] = START_LENGTH
+
+        self.directions[games] = RIGHT
+        self.scores[games] = 0
+        self.over[games] = False
+        self._place_food(games)
+
+    def _place_food(self, games: np.ndarray) -> None:
+        """Put food on a random free cell of each given game, ending games with no free cell left."""
+        interior = ~self.walls
+        # Random cells are almost always free, so retry a few times before counting free cells
+        for _ in range(4):
+            if not len(games):
+                return
+            cells = self.rng.integers(self.height * self.width, size=len(games))
+            free = interior[cells] & ~self.occupied[games, cells]
+            self.food[games[free]] = cells[free]
+            games = games[~free]
+
+        for game in games:
+            free_cells = np.flatnonzero(interior & ~self.occupied[game])
+            if len(free_cells):
+                self.food[game] = free_cells[self.rng.integers(len(free_cells))]
+            else:
+                self.over[game] = True
+
+    def step(self, directions: np.ndarray = None) -> tuple:
+        """
+        Turn each game to its direction, or -1 to keep going, then move every snake not over one cell.
+
+        Turns back onto the snake are ignored. Return masks of the games that ate, and of the games that ended
+        on this step.
+        """
+        games = np.flatnonzero(~self.over)
+        ate = np.zeros(self.num_games, dtype=bool)
+        ended = np.zeros(self.num_games, dtype=bool)
+
+        current = self.directions[games]
+        if directions is not None:
+            wanted = np.asarray(directions)[games]
+            current = np.where((wanted >= 0) & (wanted != current ^ 1), wanted, current)
+            self.directions[games] = current
+
+        starts, lengths = self.starts[games], self.lengths[games]
+        capacity = self.rings.shape[1]
+        heads = self.rings[games, starts] + self.steps[current]
+
+        # Games running into the wall end without moving
+        walled = self.walls[heads]
+        ended[games[walled]] = True
+        games, starts, lengths, heads = games[~walled], starts[~walled], lengths[~walled], heads[~walled]
+
+        # The tail moves away first, so the head can follow it into the cell it leaves
+        eating = heads == self.food[games]
+        moving = ~eating
+        tails = self.rings[games[moving], (starts[moving] + lengths[moving] - 1) % capacity]
+        self.occupied[games[moving], tails] = False
+
+        crashed = self.occupied[games, heads]
+        ended[games[crashed]] = True
+
+        starts = (starts - 1) % capacity
+        self.rings[games, starts] = heads
+        self.starts[games] = starts
+        self.occupied[games, heads] = True
+        self.lengths[games[eating]] += 1
+        self.scores[games[eating]] += 1
+        ate[games[eating]] = True
+
+        self.over |= ended
+        self._place_food(games[eating & ~crashed])
+        ended |= self.over & ate
+        return ate, ended